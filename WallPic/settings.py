@@ -82,6 +82,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "wallpapers.context_processors.navigation",
             ],
         },
     },
@@ -97,6 +98,44 @@ DATABASES = {
     }
 }
 
+# --------------------------------------------------
+# CACHE
+# --------------------------------------------------
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. Redis) so catalog invalidation reaches every worker.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "walldrafts"),
+    }
+}
+
+# Seconds cached page data may live before being rebuilt
+PAGE_CACHE_TIMEOUT = int(os.environ.get("PAGE_CACHE_TIMEOUT", "300"))
+
+# ETag time bucket and Cache-Control lifetimes for list/detail responses
+CONDITIONAL_BUCKET_SECONDS = int(os.environ.get("CONDITIONAL_BUCKET_SECONDS", "60"))
+CONDITIONAL_MAX_AGE = int(os.environ.get("CONDITIONAL_MAX_AGE", "60"))
+CONDITIONAL_STALE_WHILE_REVALIDATE = int(os.environ.get("CONDITIONAL_STALE_WHILE_REVALIDATE", "300"))
+
+# Write-behind counters: flush every N seconds or M increments
+COUNTER_FLUSH_INTERVAL = int(os.environ.get("COUNTER_FLUSH_INTERVAL", "5"))
+COUNTER_FLUSH_EVENTS = int(os.environ.get("COUNTER_FLUSH_EVENTS", "200"))
+
+# Trending scores (manage.py update_trending): half-life and flagged top-K
+TRENDING_HALF_LIFE_HOURS = float(os.environ.get("TRENDING_HALF_LIFE_HOURS", "24"))
+TRENDING_TOP_K = int(os.environ.get("TRENDING_TOP_K", "100"))
+
+# "Hot right now" tracker: per-worker time slot length, window and how often
+# workers publish their estimates to the shared cache
+HOT_SLOT_SECONDS = int(os.environ.get("HOT_SLOT_SECONDS", "300"))
+HOT_WINDOW_SECONDS = int(os.environ.get("HOT_WINDOW_SECONDS", "3600"))
+HOT_PUBLISH_INTERVAL = int(os.environ.get("HOT_PUBLISH_INTERVAL", "10"))
+
+# Raw DownloadAnalytics rows are deleted after this many days once rolled up
+# into daily totals (manage.py rollup_downloads); 0 keeps them forever
+DOWNLOAD_ANALYTICS_RETENTION_DAYS = int(os.environ.get("DOWNLOAD_ANALYTICS_RETENTION_DAYS", "90"))
+
 # --------------------------------------------------
 # PASSWORD VALIDATION
 # --------------------------------------------------
@@ -132,6 +171,22 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# On-disk cache of proxied wallpaper downloads, shared by all workers
+DOWNLOAD_CACHE_DIR = MEDIA_ROOT / "download_cache"
+DOWNLOAD_CACHE_MAX_BYTES = int(os.environ.get("DOWNLOAD_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+# Pre-generated wallpaper sitemap sections (manage.py generate_sitemaps)
+SITEMAP_DIR = MEDIA_ROOT / "sitemaps"
+
+# Per-host cap on concurrent upstream image fetches. It is shared through the
+# cache, so it only spans workers with a shared CACHE_BACKEND; keep it below
+# the worker count so a hung image host can't tie up every worker
+UPSTREAM_MAX_CONCURRENCY = int(os.environ.get("UPSTREAM_MAX_CONCURRENCY", "4"))
+
+# Let the front proxy send download bytes: "", "x-accel" (nginx) or "x-sendfile"
+# (nginx locations: deploy/nginx/downloads.conf)
+DOWNLOAD_OFFLOAD = os.environ.get("DOWNLOAD_OFFLOAD", "")
+
 # --------------------------------------------------
 # DEFAULT PRIMARY KEY
 # --------------------------------------------------
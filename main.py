@@ -35,6 +35,7 @@ except Exception as e:
     sys.exit(1)
 
 from wallpapers.models import Category, DesktopWallpaper
+from wallpapers.trending import engagement
 
 # -----------------------------
 # Configuration
@@ -495,9 +496,7 @@ def save_wallpaper_to_db(wallpaper_data, category_obj, item_num):
         views = random.randint(1000, 50000)
         downloads = random.randint(100, 10000)
         
-        # Calculate trending probability (higher for newer items)
-        is_trending_prob = min(0.15 + (item_num / 100), 0.3)  # Up to 30% chance
-        is_trending = random.random() < is_trending_prob
+        favorites = random.randint(0, int(likes * 0.7))
         
         # Create wallpaper entry
         wallpaper = DesktopWallpaper(
@@ -513,11 +512,11 @@ def save_wallpaper_to_db(wallpaper_data, category_obj, item_num):
             file_format='JPEG',
             quality_label=get_quality_label(height),
             likes_count=likes,
-            favorites_count=random.randint(0, int(likes * 0.7)),
+            favorites_count=favorites,
             downloads_count=downloads,
             views_count=views,
-            is_trending=is_trending,
-            trending_percentage=random.randint(1, 5) if is_trending else 0,
+            # Seeded counts are history, not fresh engagement for update_trending
+            trending_engagement_seen=engagement(views=views, likes=likes, favorites=favorites),
             is_featured=random.random() < 0.03,  # 3% chance to be featured
             display_order=item_num,
         )
@@ -1,6 +1,7 @@
 # populate_wallpapers_with_category.py - FIXED FOR SIMILAR FILENAMES
 import sqlite3
 import os
+import sys
 import random
 import re
 import json
@@ -12,6 +13,16 @@ import hashlib
 import shutil
 from difflib import SequenceMatcher
 
+# Rows are inserted with raw SQL; Django supplies the trending weights and
+# afterwards builds what DesktopWallpaper.save() would have (tag links and
+# counts, palette colors, category stats)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'WallPic.settings')
+import django
+django.setup()
+from django.core.management import call_command
+from wallpapers.trending import engagement
+
 def connect_to_database():
     """Connect to SQLite database."""
     db_path = os.path.join(os.path.dirname(__file__), 'db.sqlite3')
@@ -513,8 +524,10 @@ def insert_wallpaper(conn, wallpaper_data, category_id, is_desktop=True):
     favorites_count = random.randint(500, 8000)
     downloads_count = random.randint(100, 5000)
     views_count = random.randint(5000, 50000)
-    trending_percentage = random.randint(10, 95) if random.random() > 0.7 else 0
-    is_trending = random.random() > 0.7
+    # Seeded counts are history, not fresh engagement: mark them as already scored
+    trending_engagement_seen = engagement(
+        views=views_count, likes=likes_count, favorites=favorites_count
+    )
     is_featured = random.random() > 0.7
     current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
@@ -524,9 +537,10 @@ def insert_wallpaper(conn, wallpaper_data, category_id, is_desktop=True):
         (title, category_id, tags, color_palette, image_url, thumbnail_url,
          resolution_width, resolution_height, aspect_ratio, file_format,
          cdn_path, quality_label, likes_count, favorites_count, downloads_count,
-         views_count, is_trending, trending_percentage, is_featured,
-         similarity_score, display_order, created_at, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+         views_count, is_trending, trending_percentage, trending_score,
+         trending_engagement_seen, is_featured, similarity_score, display_order,
+         created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             wallpaper_data['title'],
             category_id,
@@ -544,8 +558,10 @@ def insert_wallpaper(conn, wallpaper_data, category_id, is_desktop=True):
             favorites_count,
             downloads_count,
             views_count,
-            is_trending,
-            trending_percentage,
+            False,  # is_trending (set by update_trending)
+            0,  # trending_percentage
+            0.0,  # trending_score
+            trending_engagement_seen,
             is_featured,
             0.0,  # similarity_score
             wallpaper_data['display_order'],
@@ -566,8 +582,9 @@ def insert_wallpaper(conn, wallpaper_data, category_id, is_desktop=True):
          resolution_width, resolution_height, aspect_ratio, file_format,
          cdn_path, quality_label, device_type, likes_count, favorites_count,
          downloads_count, views_count, is_trending, trending_percentage,
-         is_featured, similarity_score, display_order, created_at, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+         trending_score, trending_engagement_seen, is_featured, similarity_score,
+         display_order, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             wallpaper_data['title'],
             category_id,
@@ -586,8 +603,10 @@ def insert_wallpaper(conn, wallpaper_data, category_id, is_desktop=True):
             favorites_count,
             downloads_count,
             views_count,
-            is_trending,
-            trending_percentage,
+            False,  # is_trending (set by update_trending)
+            0,  # trending_percentage
+            0.0,  # trending_score
+            trending_engagement_seen,
             is_featured,
             0.0,  # similarity_score
             wallpaper_data['display_order'],
@@ -606,6 +625,20 @@ def insert_wallpaper(conn, wallpaper_data, category_id, is_desktop=True):
     conn.commit()
     return wallpaper_id
 
+def get_max_wallpaper_ids(conn):
+    """Highest desktop and mobile wallpaper ids before an import."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT MAX(id) FROM wallpapers_desktopwallpaper")
+    desktop_max = cursor.fetchone()[0] or 0
+    cursor.execute("SELECT MAX(id) FROM wallpapers_mobilewallpaper")
+    mobile_max = cursor.fetchone()[0] or 0
+    return desktop_max, mobile_max
+
+def resync_imported(desktop_after, mobile_after):
+    """Build tag links, palette colors and category stats for the wallpapers inserted since the given ids."""
+    print("\n🔄 Syncing tags, colors and category stats for imported wallpapers...")
+    call_command('resync_wallpapers', desktop_after=desktop_after, mobile_after=mobile_after)
+
 def process_category(conn, category_id, category_name, base_folder="."):
     """Process all wallpapers for a specific category."""
     print(f"\n📂 Processing: {category_name} (ID: {category_id})")
@@ -718,6 +751,7 @@ def main():
     
     # Connect to database
     conn = connect_to_database()
+    desktop_after, mobile_after = get_max_wallpaper_ids(conn)
     
     # Get all categories
     categories = get_all_categories(conn)
@@ -800,6 +834,8 @@ def main():
         print(f"Desktop: {total_stats['desktop']}")
         print(f"Mobile: {total_stats['mobile']}")
     
+    resync_imported(desktop_after, mobile_after)
+    
     # Show updated category counts
     print(f"\n{'='*70}")
     print("UPDATED CATEGORY COUNTS")
@@ -1,6 +1,7 @@
 from django.contrib import admin
-from .models import Category, DesktopWallpaper, MobileWallpaper, DownloadAnalytics, FeaturedSchedule
+from .models import Category, DesktopWallpaper, MobileWallpaper, DownloadAnalytics, DownloadDailyRollup, FeaturedSchedule, JobCheckpoint, Tag
 from django.utils.html import format_html
+from .rollups import category_unique_downloaders, recent_downloads, unique_downloaders
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -9,6 +10,23 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ('name',)
     prepopulated_fields = {'slug': ('name',)}
     ordering = ('display_order', 'name')
+    readonly_fields = ('unique_downloaders_7_days', 'unique_downloaders_30_days')
+    
+    # Merged from desktop wallpaper sketches only
+    @admin.display(description='Unique desktop downloaders (7 days)')
+    def unique_downloaders_7_days(self, obj):
+        return category_unique_downloaders(obj.pk, days=7) if obj.pk else 0
+    
+    @admin.display(description='Unique desktop downloaders (30 days)')
+    def unique_downloaders_30_days(self, obj):
+        return category_unique_downloaders(obj.pk, days=30) if obj.pk else 0
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'desktop_wallpaper_count', 'mobile_wallpaper_count')
+    search_fields = ('name', 'slug')
+    readonly_fields = ('desktop_wallpaper_count', 'mobile_wallpaper_count')
+    ordering = ('-desktop_wallpaper_count',)
 
 @admin.register(DesktopWallpaper)
 class DesktopWallpaperAdmin(admin.ModelAdmin):
@@ -16,7 +34,8 @@ class DesktopWallpaperAdmin(admin.ModelAdmin):
                     'downloads_count', 'views_count', 'is_trending', 'is_featured', 'created_at')
     list_filter = ('category', 'quality_label', 'is_trending', 'is_featured', 'created_at')
     search_fields = ('title', 'tags')
-    readonly_fields = ('downloads_count', 'views_count', 'likes_count', 'favorites_count')
+    readonly_fields = ('downloads_count', 'views_count', 'likes_count', 'favorites_count', 'trending_score',
+                       'downloads_last_30_days', 'unique_downloaders_7_days', 'unique_downloaders_30_days')
     fieldsets = (
         ('Basic Info', {
             'fields': ('title', 'category', 'tags')
@@ -31,13 +50,26 @@ class DesktopWallpaperAdmin(admin.ModelAdmin):
             'fields': ('color_palette', 'cdn_path')
         }),
         ('Stats', {
-            'fields': ('downloads_count', 'views_count', 'likes_count', 'favorites_count')
+            'fields': ('downloads_count', 'downloads_last_30_days', 'unique_downloaders_7_days',
+                       'unique_downloaders_30_days', 'views_count', 'likes_count', 'favorites_count')
         }),
         ('Featured', {
-            'fields': ('is_trending', 'trending_percentage', 'is_featured', 'display_order')
+            'fields': ('is_trending', 'trending_percentage', 'trending_score', 'is_featured', 'display_order')
         }),
     )
     
+    @admin.display(description='Downloads (30 days)')
+    def downloads_last_30_days(self, obj):
+        return recent_downloads('desktop', obj.pk) if obj.pk else 0
+    
+    @admin.display(description='Unique downloaders (7 days)')
+    def unique_downloaders_7_days(self, obj):
+        return unique_downloaders('desktop', obj.pk, days=7) if obj.pk else 0
+    
+    @admin.display(description='Unique downloaders (30 days)')
+    def unique_downloaders_30_days(self, obj):
+        return unique_downloaders('desktop', obj.pk, days=30) if obj.pk else 0
+    
     def image_preview(self, obj):
         return format_html(f'<img src="{obj.thumbnail_url}" style="max-height: 100px;" />')
 
@@ -47,17 +79,53 @@ class MobileWallpaperAdmin(admin.ModelAdmin):
                     'quality_label', 'downloads_count', 'views_count', 'is_trending', 'is_featured')
     list_filter = ('category', 'device_type', 'quality_label', 'is_trending', 'is_featured')
     search_fields = ('title', 'tags')
-    readonly_fields = ('downloads_count', 'views_count', 'likes_count', 'favorites_count')
+    readonly_fields = ('downloads_count', 'views_count', 'likes_count', 'favorites_count',
+                       'downloads_last_30_days', 'unique_downloaders_7_days', 'unique_downloaders_30_days')
+    
+    @admin.display(description='Downloads (30 days)')
+    def downloads_last_30_days(self, obj):
+        return recent_downloads('mobile', obj.pk) if obj.pk else 0
+    
+    @admin.display(description='Unique downloaders (7 days)')
+    def unique_downloaders_7_days(self, obj):
+        return unique_downloaders('mobile', obj.pk, days=7) if obj.pk else 0
+    
+    @admin.display(description='Unique downloaders (30 days)')
+    def unique_downloaders_30_days(self, obj):
+        return unique_downloaders('mobile', obj.pk, days=30) if obj.pk else 0
 
 @admin.register(DownloadAnalytics)
 class DownloadAnalyticsAdmin(admin.ModelAdmin):
+    # Raw events only; reporting goes through DownloadDailyRollup
     list_display = ('wallpaper_type', 'wallpaper_id', 'device_type', 'timestamp')
-    list_filter = ('wallpaper_type', 'device_type', 'timestamp')
+    list_filter = ('wallpaper_type', 'device_type')
     readonly_fields = ('timestamp',)
-    date_hierarchy = 'timestamp'
+    show_full_result_count = False
+
+@admin.register(DownloadDailyRollup)
+class DownloadDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'wallpaper_type', 'wallpaper_id', 'device_type', 'count', 'unique_ip_hashes')
+    list_filter = ('wallpaper_type', 'device_type', 'date')
+    search_fields = ('=wallpaper_id',)
+    readonly_fields = ('date', 'wallpaper_type', 'wallpaper_id', 'device_type', 'count', 'unique_ip_hashes')
+    date_hierarchy = 'date'
 
 @admin.register(FeaturedSchedule)
 class FeaturedScheduleAdmin(admin.ModelAdmin):
-    list_display = ('wallpaper_type', 'wallpaper_id', 'featured_date', 'is_daily_featured')
+    list_display = ('wallpaper_type', 'wallpaper_id', 'wallpaper_title', 'featured_date', 'is_daily_featured')
     list_filter = ('wallpaper_type', 'featured_date', 'is_daily_featured')
-    ordering = ('-featured_date', 'display_order')
\ No newline at end of file
+    ordering = ('-featured_date', 'display_order')
+    
+    def get_queryset(self, request):
+        # One query per wallpaper type for the whole page of schedules
+        return super().get_queryset(request).with_wallpapers()
+    
+    @admin.display(description='Wallpaper')
+    def wallpaper_title(self, obj):
+        wallpaper = obj.get_wallpaper()
+        return wallpaper.title if wallpaper else '(missing)'
+
+@admin.register(JobCheckpoint)
+class JobCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('name', 'last_id', 'updated_at')
+    readonly_fields = ('updated_at',)
@@ -0,0 +1,150 @@
+# wallpapers/analytics.py
+"""Asynchronous, batched DownloadAnalytics ingestion.
+
+Download views hand raw event data to ``analytics_writer.record()``, which
+only does a non-blocking put onto a bounded queue. A background thread
+hashes IPs, truncates user agents and writes events with ``bulk_create``
+in batches; each event keeps the time it was recorded. When the queue is full, events are dropped and counted rather
+than slowing down or failing the download.
+"""
+
+import atexit
+import hashlib
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import metrics
+from .models import DownloadAnalytics
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_ASYNC = getattr(settings, 'ANALYTICS_ASYNC', True)
+ANALYTICS_QUEUE_SIZE = getattr(settings, 'ANALYTICS_QUEUE_SIZE', 10000)
+ANALYTICS_BATCH_SIZE = getattr(settings, 'ANALYTICS_BATCH_SIZE', 500)
+ANALYTICS_FLUSH_INTERVAL = getattr(settings, 'ANALYTICS_FLUSH_INTERVAL', 2.0)
+
+USER_AGENT_MAX_LENGTH = 500
+
+
+def build_event(event):
+    """Turn a raw queued event into an unsaved DownloadAnalytics row"""
+    ip_address = event.pop('ip_address', '')
+    if ip_address:
+        ip_hash = hashlib.sha256(ip_address.encode()).hexdigest()[:64]
+    else:
+        ip_hash = ''
+    event['user_agent'] = event.get('user_agent', '')[:USER_AGENT_MAX_LENGTH]
+    return DownloadAnalytics(ip_hash=ip_hash, **event)
+
+
+class AnalyticsWriter:
+    """Bounded queue drained into DownloadAnalytics by a daemon thread"""
+
+    def __init__(self, maxsize=ANALYTICS_QUEUE_SIZE, batch_size=ANALYTICS_BATCH_SIZE,
+                 interval=ANALYTICS_FLUSH_INTERVAL, enabled=ANALYTICS_ASYNC):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.enabled = enabled
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stats = {
+            'enqueued': 0,
+            'written': 0,
+            'dropped': 0,
+            'failed': 0,
+            'batches': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+        }
+
+    def record(self, **event):
+        """Queue one download event; never blocks or raises"""
+        # Stamped now: the row may be written seconds (or a backlog) later
+        event.setdefault('timestamp', timezone.now())
+        if not self.enabled:
+            self._write([event])
+            return
+        try:
+            self._queue.put_nowait(event)
+            self._stats['enqueued'] += 1
+        except queue.Full:
+            self._stats['dropped'] += 1
+            return
+        self._ensure_thread()
+
+    def metrics(self):
+        return dict(self._stats, queue_depth=self._queue.qsize())
+
+    def flush(self):
+        """Write everything currently queued (used at shutdown)"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def _write(self, events):
+        started = time.monotonic()
+        try:
+            with self._write_lock:
+                DownloadAnalytics.objects.bulk_create(
+                    [build_event(event) for event in events],
+                    batch_size=self.batch_size,
+                )
+            self._stats['written'] += len(events)
+        except Exception as e:
+            self._stats['failed'] += len(events)
+            logger.error(f"Analytics batch of {len(events)} failed: {e}")
+        finally:
+            elapsed = (time.monotonic() - started) * 1000
+            self._stats['batches'] += 1
+            self._stats['last_flush_ms'] = round(elapsed, 2)
+            self._stats['max_flush_ms'] = max(self._stats['max_flush_ms'], round(elapsed, 2))
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='analytics-writer', daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            finally:
+                close_old_connections()
+
+
+analytics_writer = AnalyticsWriter()
+
+metrics.register('analytics', analytics_writer.metrics)
@@ -0,0 +1,86 @@
+# wallpapers/cache.py
+"""Catalog-versioned caching helpers.
+
+Every write to the catalog (wallpapers or categories) bumps a single
+"catalog version" number stored in the shared cache. Cached page data is
+keyed by that version, so stale entries simply stop being read and expire
+on their own instead of having to be deleted one by one.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+# Upper bound for cached page data. Counter updates (views, downloads,
+# likes) don't bump the catalog version, so this keeps them reasonably fresh.
+PAGE_CACHE_TIMEOUT = getattr(settings, 'PAGE_CACHE_TIMEOUT', 300)
+
+
+def get_catalog_version():
+    """Return the current catalog version, initialising it if needed"""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY, 1)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every catalog-keyed cache entry"""
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        # Key missing (first write or evicted) - start a fresh sequence
+        cache.set(CATALOG_VERSION_KEY, 2, timeout=None)
+        return 2
+
+
+def catalog_cache_key(name):
+    """Build a cache key that changes whenever the catalog does"""
+    return f'{name}:v{get_catalog_version()}'
+
+
+def get_or_build(name, builder, timeout=PAGE_CACHE_TIMEOUT):
+    """Return the cached value for ``name``, building it on a miss.
+
+    ``builder`` must return a picklable value (evaluate querysets to lists).
+    """
+    key = catalog_cache_key(name)
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, timeout)
+    return value
+
+
+# ==================== CATEGORY NAVIGATION ====================
+
+# Process-local copy of the header categories, stamped with the catalog
+# version it was built for: (version, [Category, ...])
+_nav_categories = None
+
+
+def get_nav_categories():
+    """Active, non-empty categories for the site header, memoised in-process"""
+    global _nav_categories
+    from .models import Category
+    
+    version = get_catalog_version()
+    if _nav_categories is None or _nav_categories[0] != version:
+        categories = list(Category.objects.filter(
+            is_active=True
+        ).annotate(
+            total_wallpapers=models.F('desktop_wallpaper_count')
+        ).filter(
+            total_wallpapers__gt=0
+        ).order_by('display_order', 'name'))
+        _nav_categories = (version, categories)
+    return _nav_categories[1]
+
+
+def invalidate_nav_categories():
+    """Drop this process's copy of the header categories"""
+    global _nav_categories
+    _nav_categories = None
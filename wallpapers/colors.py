@@ -0,0 +1,166 @@
+# wallpapers/colors.py
+"""Search by color through quantized palette buckets.
+
+Every palette color is mapped to a small integer bucket on an HLS grid:
+12 hue bins x 4 lightness bins for chromatic colors, plus 4 lightness-only
+gray buckets for colors with little saturation. The buckets are stored in
+the indexed ``WallpaperColor`` side table when a wallpaper is saved.
+
+A color query is quantized the same way and expanded to its neighbouring
+buckets (adjacent hue or lightness), so "nearest color" becomes a handful
+of ``bucket IN (...)`` index lookups. Results rank exact-bucket matches
+before neighbours and primary palette colors before secondary ones.
+"""
+
+import colorsys
+import json
+import re
+
+from django.db.models import Case, F, IntegerField, Min, Value, When
+
+from .models import DesktopWallpaper, WallpaperColor
+
+HUE_BINS = 12
+LIGHTNESS_BINS = 4
+
+# HLS saturation below which a color counts as gray
+GRAY_SATURATION = 0.15
+
+# Palettes are JSON objects with these keys (or plain lists of colors)
+PALETTE_ROLES = ('primary', 'secondary', 'accent')
+
+# Only the first few palette colors are indexed
+MAX_PALETTE_COLORS = 6
+
+HEX_RE = re.compile(r'^#?([0-9a-fA-F]{3}|[0-9a-fA-F]{6})$')
+
+
+def parse_hex(value):
+    """``'#ff6b6b'``/``'f66'`` -> (r, g, b) floats in 0..1, or None"""
+    match = HEX_RE.match((value or '').strip())
+    if not match:
+        return None
+    digits = match.group(1)
+    if len(digits) == 3:
+        digits = ''.join(digit * 2 for digit in digits)
+    return tuple(int(digits[i:i + 2], 16) / 255 for i in (0, 2, 4))
+
+
+def color_bucket(value):
+    """Quantize a hex color to its bucket number, or None if it isn't one"""
+    rgb = parse_hex(value)
+    if rgb is None:
+        return None
+    hue, lightness, saturation = colorsys.rgb_to_hls(*rgb)
+    light_bin = min(int(lightness * LIGHTNESS_BINS), LIGHTNESS_BINS - 1)
+    if saturation < GRAY_SATURATION:
+        return light_bin
+    hue_bin = int(hue * HUE_BINS) % HUE_BINS
+    return LIGHTNESS_BINS + hue_bin * LIGHTNESS_BINS + light_bin
+
+
+def nearby_buckets(bucket):
+    """``{bucket: distance}`` for the bucket and its neighbours on the grid"""
+    nearby = {bucket: 0}
+    if bucket < LIGHTNESS_BINS:
+        # Grays: the next lighter and darker gray
+        for light_bin in (bucket - 1, bucket + 1):
+            if 0 <= light_bin < LIGHTNESS_BINS:
+                nearby[light_bin] = 1
+        return nearby
+
+    hue_bin, light_bin = divmod(bucket - LIGHTNESS_BINS, LIGHTNESS_BINS)
+    for neighbour_hue in (hue_bin - 1, hue_bin + 1):
+        nearby[LIGHTNESS_BINS + (neighbour_hue % HUE_BINS) * LIGHTNESS_BINS + light_bin] = 1
+    for neighbour_light in (light_bin - 1, light_bin + 1):
+        if 0 <= neighbour_light < LIGHTNESS_BINS:
+            nearby[LIGHTNESS_BINS + hue_bin * LIGHTNESS_BINS + neighbour_light] = 1
+    return nearby
+
+
+def palette_colors(palette):
+    """Hex colors of a stored palette, primary first"""
+    if isinstance(palette, str):
+        try:
+            palette = json.loads(palette)
+        except ValueError:
+            return []
+    if isinstance(palette, dict):
+        ordered = [palette[role] for role in PALETTE_ROLES if role in palette]
+        ordered += [value for key, value in palette.items() if key not in PALETTE_ROLES]
+        palette = ordered
+    if not isinstance(palette, (list, tuple)):
+        return []
+    return [value for value in palette if isinstance(value, str)][:MAX_PALETTE_COLORS]
+
+
+def palette_buckets(palette):
+    """``{position: bucket}`` for the valid colors of a palette"""
+    buckets = {}
+    for position, value in enumerate(palette_colors(palette)):
+        bucket = color_bucket(value)
+        if bucket is not None:
+            buckets[position] = bucket
+    return buckets
+
+
+def color_filter_ids(value):
+    """Subquery of wallpaper ids with a palette color near ``value``, or None"""
+    bucket = color_bucket(value)
+    if bucket is None:
+        return None
+    return WallpaperColor.objects.filter(
+        bucket__in=list(nearby_buckets(bucket))
+    ).values('wallpaper_id')
+
+
+class ColorResults:
+    """Desktop wallpapers nearest to a color, for Paginator"""
+
+    def __init__(self, value):
+        self.color = value
+        bucket = color_bucket(value)
+        self.buckets = nearby_buckets(bucket) if bucket is not None else {}
+        self._count = None
+
+    def _ranked(self):
+        # Lower is closer: grid distance first, then palette position
+        score = Case(
+            *[When(bucket=bucket, then=Value(distance * MAX_PALETTE_COLORS))
+              for bucket, distance in self.buckets.items()],
+            output_field=IntegerField(),
+        )
+        return (
+            WallpaperColor.objects.filter(bucket__in=list(self.buckets))
+            .values('wallpaper_id')
+            .annotate(score=Min(score + F('position')))
+            .order_by('score', '-wallpaper_id')
+        )
+
+    def count(self):
+        if self._count is None:
+            if not self.buckets:
+                self._count = 0
+            else:
+                self._count = (
+                    WallpaperColor.objects.filter(bucket__in=list(self.buckets))
+                    .values('wallpaper_id').distinct().count()
+                )
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        if not self.buckets:
+            return []
+        ids = [row['wallpaper_id'] for row in self._ranked()[key]]
+        wallpapers = DesktopWallpaper.objects.in_bulk(ids)
+        return [wallpapers[wid] for wid in ids if wid in wallpapers]
+
+
+def search_by_color(value):
+    """Ranked desktop wallpapers near a hex color"""
+    return ColorResults(value)
@@ -0,0 +1,96 @@
+# wallpapers/conditional.py
+"""ETag validators and Cache-Control for list and detail views.
+
+The ETag is a hash of the catalog version, a coarse time bucket and the
+request URL (plus the visitor's like/favorite state for pages that show
+it). Any catalog write bumps the version and changes every tag; counter
+updates don't, so the time bucket lets counts refresh at most every
+CONDITIONAL_BUCKET_SECONDS. A matching ``If-None-Match`` is answered with
+304 before the view queries, renders or serializes anything.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+from .cache import get_catalog_version
+
+CONDITIONAL_BUCKET_SECONDS = getattr(settings, 'CONDITIONAL_BUCKET_SECONDS', 60)
+CONDITIONAL_MAX_AGE = getattr(settings, 'CONDITIONAL_MAX_AGE', 60)
+CONDITIONAL_STALE_WHILE_REVALIDATE = getattr(settings, 'CONDITIONAL_STALE_WHILE_REVALIDATE', 300)
+
+SESSION_FLAG_PREFIXES = ('liked_', 'favorited_')
+
+
+def session_state(request):
+    """Digest of the visitor's liked/favorited flags"""
+    flags = sorted(
+        key for key, value in request.session.items()
+        if value and key.startswith(SESSION_FLAG_PREFIXES)
+    )
+    return hashlib.md5(','.join(flags).encode()).hexdigest()[:12]
+
+
+def catalog_etag(request, *parts):
+    """Quoted ETag for ``request`` under the current catalog version"""
+    bucket = int(time.time() // CONDITIONAL_BUCKET_SECONDS)
+    raw = '|'.join(
+        str(part) for part in (get_catalog_version(), bucket, request.get_full_path(), *parts)
+    )
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def _patch_caching(response, private):
+    patch_cache_control(
+        response,
+        max_age=CONDITIONAL_MAX_AGE,
+        stale_while_revalidate=CONDITIONAL_STALE_WHILE_REVALIDATE,
+        **({'private': True} if private else {'public': True}),
+    )
+    if private:
+        patch_vary_headers(response, ('Cookie',))
+
+
+def conditional_view(private=False, vary=(), not_modified=None):
+    """Answer GET/HEAD with 304 when the client's ETag is still current.
+
+    ``private`` views depend on the session: their tag includes the
+    visitor's like/favorite state and caches are told not to share them.
+    Request headers named in ``vary`` become part of the tag and the Vary
+    header. ``not_modified(request, *args, **kwargs)`` runs on a 304 for
+    side effects the view would otherwise have had (e.g. view counting).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            parts = [request.headers.get(header, '') for header in vary]
+            if private:
+                parts.append(session_state(request))
+            etag = catalog_etag(request, *parts)
+
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                if response.status_code != 304:
+                    # 412 for a failed If-Match
+                    return response
+                if not_modified:
+                    not_modified(request, *args, **kwargs)
+            else:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                response['ETag'] = etag
+
+            _patch_caching(response, private)
+            if vary:
+                patch_vary_headers(response, vary)
+            return response
+        return wrapper
+    return decorator
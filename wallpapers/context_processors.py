@@ -0,0 +1,9 @@
+# wallpapers/context_processors.py
+from .cache import get_nav_categories
+
+
+def navigation(request):
+    """Categories for the header dropdown and footer on every page"""
+    return {
+        'categories': get_nav_categories(),
+    }
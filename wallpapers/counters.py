@@ -0,0 +1,182 @@
+# wallpapers/counters.py
+"""Write-behind buffer for wallpaper counters.
+
+View and download increments are collected in memory per worker and
+written as one batched ``UPDATE ... SET col = col + CASE id ... END``
+every COUNTER_FLUSH_INTERVAL seconds or COUNTER_FLUSH_EVENTS increments,
+whichever comes first, and again when the worker exits. Category stats
+touched by the same increments are flushed in a second batched UPDATE,
+in the same transaction.
+Like/favorite toggles need the new value at once and go through
+``mutate_counter`` instead.
+
+Pending deltas are visible through ``pending()``/``apply_pending()`` so a
+page can show counts that include its own not-yet-flushed increments.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+
+from . import metrics
+from .models import Category, DesktopWallpaper
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ('views_count', 'downloads_count', 'likes_count', 'favorites_count')
+
+# Wallpaper counters that also roll up into Category stats
+CATEGORY_FIELDS = {
+    'downloads_count': 'desktop_downloads_count',
+    'likes_count': 'desktop_likes_count',
+}
+
+COUNTER_BUFFER_ENABLED = getattr(settings, 'COUNTER_BUFFER_ENABLED', True)
+COUNTER_FLUSH_INTERVAL = getattr(settings, 'COUNTER_FLUSH_INTERVAL', 5)
+COUNTER_FLUSH_EVENTS = getattr(settings, 'COUNTER_FLUSH_EVENTS', 200)
+
+
+def _batched_update(model, deltas, field_map=None):
+    """Apply {pk: {field: delta}} to ``model`` in a single UPDATE"""
+    field_map = field_map or {}
+    columns = defaultdict(list)
+    for pk, fields in deltas.items():
+        for field, delta in fields.items():
+            if delta:
+                columns[field_map.get(field, field)].append(When(pk=pk, then=Value(delta)))
+    if not columns:
+        return
+    updates = {
+        column: Greatest(
+            F(column) + Case(*whens, default=Value(0), output_field=IntegerField()),
+            0,
+        )
+        for column, whens in columns.items()
+    }
+    model.objects.filter(pk__in=list(deltas)).update(**updates)
+
+
+class CounterBuffer:
+    """Per-process accumulator for DesktopWallpaper counter increments"""
+
+    def __init__(self, interval=COUNTER_FLUSH_INTERVAL, max_events=COUNTER_FLUSH_EVENTS,
+                 enabled=COUNTER_BUFFER_ENABLED):
+        self.interval = interval
+        self.max_events = max_events
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._pending = defaultdict(lambda: defaultdict(int))
+        self._categories = {}
+        self._events = 0
+        self._last_flush = time.monotonic()
+        self._thread = None
+
+    def add(self, wallpaper_id, field, delta=1, category_id=None):
+        """Record an increment (or decrement) for a wallpaper counter"""
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f'Unknown counter field: {field}')
+        with self._lock:
+            self._pending[wallpaper_id][field] += delta
+            if category_id is not None:
+                self._categories[wallpaper_id] = category_id
+            self._events += 1
+            due = (
+                not self.enabled
+                or self._events >= self.max_events
+                or time.monotonic() - self._last_flush >= self.interval
+            )
+        if due:
+            self.flush()
+        else:
+            self._ensure_thread()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'pending_wallpapers': len(self._pending),
+                'pending_events': self._events,
+            }
+
+    def pending(self, wallpaper_id, field):
+        """Unflushed delta for one counter"""
+        with self._lock:
+            fields = self._pending.get(wallpaper_id)
+            return fields.get(field, 0) if fields else 0
+
+    def apply_pending(self, wallpaper):
+        """Add unflushed deltas to a loaded wallpaper's counter attributes"""
+        with self._lock:
+            fields = dict(self._pending.get(wallpaper.id, {}))
+        for field, delta in fields.items():
+            setattr(wallpaper, field, max(getattr(wallpaper, field) + delta, 0))
+        return wallpaper
+
+    def flush(self):
+        """Write all pending deltas to the database"""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(lambda: defaultdict(int))
+            categories, self._categories = self._categories, {}
+            self._events = 0
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+
+        category_deltas = defaultdict(lambda: defaultdict(int))
+        for wallpaper_id, fields in pending.items():
+            category_id = categories.get(wallpaper_id)
+            if category_id is None:
+                continue
+            for field in CATEGORY_FIELDS:
+                if fields.get(field):
+                    category_deltas[category_id][field] += fields[field]
+
+        try:
+            # All or nothing, so restored deltas are never applied twice
+            with transaction.atomic():
+                _batched_update(DesktopWallpaper, pending)
+                _batched_update(Category, category_deltas, CATEGORY_FIELDS)
+        except Exception as e:
+            logger.error(f"Counter flush failed, keeping deltas: {e}")
+            self._restore(pending, categories)
+
+    def _restore(self, pending, categories):
+        with self._lock:
+            for wallpaper_id, fields in pending.items():
+                for field, delta in fields.items():
+                    self._pending[wallpaper_id][field] += delta
+            for wallpaper_id, category_id in categories.items():
+                self._categories.setdefault(wallpaper_id, category_id)
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='counter-flush', daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if time.monotonic() - self._last_flush < self.interval:
+                continue
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+counter_buffer = CounterBuffer()
+
+metrics.register('counters', counter_buffer.metrics)
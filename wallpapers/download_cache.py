@@ -0,0 +1,203 @@
+# wallpapers/download_cache.py
+"""Size-bounded on-disk LRU cache for proxied wallpaper downloads.
+
+Files live under DOWNLOAD_CACHE_DIR (``MEDIA_ROOT/download_cache`` by
+default), named by the SHA-256 of the upstream URL and fanned out over 256
+subdirectories. Writes go to a temporary file that is atomically renamed
+into place once the whole body has arrived, so every gunicorn worker can
+share the directory and readers never see a partial image. Hits refresh
+the file's mtime; eviction removes the least recently used files once the
+total size passes DOWNLOAD_CACHE_MAX_BYTES.
+"""
+
+import hashlib
+import logging
+import mimetypes
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_CACHE_DIR = getattr(
+    settings, 'DOWNLOAD_CACHE_DIR', os.path.join(settings.MEDIA_ROOT, 'download_cache')
+)
+DOWNLOAD_CACHE_MAX_BYTES = getattr(settings, 'DOWNLOAD_CACHE_MAX_BYTES', 2 * 1024 ** 3)
+
+# Don't let one huge file push out most of the cache
+DOWNLOAD_CACHE_MAX_FILE_BYTES = getattr(
+    settings, 'DOWNLOAD_CACHE_MAX_FILE_BYTES', DOWNLOAD_CACHE_MAX_BYTES // 10
+)
+
+# Minimum seconds between eviction scans in one process
+EVICTION_INTERVAL = 60
+
+# Leftover temp files from crashed workers are removed after this long
+STALE_TEMP_SECONDS = 3600
+
+TEMP_PREFIX = '.tmp-'
+
+
+class CachedFile:
+    """A complete cached download on disk"""
+
+    def __init__(self, path, size, key, content_type):
+        self.path = path
+        self.size = size
+        self.key = key
+        self.content_type = content_type
+
+    @property
+    def etag(self):
+        return f'"{self.key[:32]}-{self.size:x}"'
+
+
+class CacheWriter:
+    """Collects one download into a temp file and publishes it on commit"""
+
+    def __init__(self, cache, key, expected_size=None):
+        self.cache = cache
+        self.key = key
+        self.expected_size = expected_size
+        self.written = 0
+        self.failed = False
+        directory = os.path.dirname(cache.path_for(key))
+        os.makedirs(directory, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(prefix=TEMP_PREFIX, dir=directory)
+        self._file = os.fdopen(fd, 'wb')
+
+    def write(self, chunk):
+        if self.failed:
+            return
+        self.written += len(chunk)
+        if self.written > DOWNLOAD_CACHE_MAX_FILE_BYTES:
+            self.abort()
+            return
+        try:
+            self._file.write(chunk)
+        except OSError as e:
+            logger.warning(f"Download cache write failed: {e}")
+            self.abort()
+
+    def commit(self):
+        """Publish the file if it is complete, otherwise discard it"""
+        if self.failed:
+            return
+        if self.expected_size is not None and self.written != self.expected_size:
+            self.abort()
+            return
+        try:
+            self._file.close()
+            os.replace(self.temp_path, self.cache.path_for(self.key))
+        except OSError as e:
+            logger.warning(f"Download cache commit failed: {e}")
+            self.abort()
+            return
+        self.cache.maybe_evict()
+
+    def abort(self):
+        self.failed = True
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        try:
+            os.unlink(self.temp_path)
+        except OSError:
+            pass
+
+
+class DownloadCache:
+    """Shared LRU blob cache keyed by image URL"""
+
+    def __init__(self, directory=DOWNLOAD_CACHE_DIR, max_bytes=DOWNLOAD_CACHE_MAX_BYTES):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self._last_eviction = 0.0
+        self._evict_lock = threading.Lock()
+
+    @staticmethod
+    def key_for(url):
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def lookup(self, url):
+        """Return the CachedFile for ``url``, or None on a miss"""
+        key = self.key_for(url)
+        path = self.path_for(key)
+        try:
+            size = os.stat(path).st_size
+            # Touch for LRU ordering
+            os.utime(path)
+        except OSError:
+            return None
+        content_type = mimetypes.guess_type(urlparse(url).path)[0] or 'image/jpeg'
+        return CachedFile(path, size, key, content_type)
+
+    def writer(self, url, expected_size=None):
+        """Start caching a download of ``url``; None if it can't be cached"""
+        if expected_size is not None and expected_size > DOWNLOAD_CACHE_MAX_FILE_BYTES:
+            return None
+        try:
+            return CacheWriter(self, self.key_for(url), expected_size)
+        except OSError as e:
+            logger.warning(f"Download cache unavailable: {e}")
+            return None
+
+    def maybe_evict(self):
+        now = time.monotonic()
+        if now - self._last_eviction < EVICTION_INTERVAL:
+            return
+        if not self._evict_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_eviction = now
+            self.evict()
+        finally:
+            self._evict_lock.release()
+
+    def evict(self):
+        """Delete least recently used files until under 90% of the limit"""
+        entries = []
+        total = 0
+        stale_before = time.time() - STALE_TEMP_SECONDS
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.startswith(TEMP_PREFIX):
+                    if stat.st_mtime < stale_before:
+                        self._remove(path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for _mtime, size, path in sorted(entries):
+            if total <= target:
+                break
+            if self._remove(path):
+                total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.unlink(path)
+            return True
+        except OSError:
+            # Another worker got there first
+            return False
+
+
+download_cache = DownloadCache()
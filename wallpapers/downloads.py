@@ -0,0 +1,309 @@
+# wallpapers/downloads.py
+"""Streaming download proxy for wallpaper images.
+
+Upstream images are fetched through one shared ``requests.Session`` per
+process, so connections to each image host are pooled and kept alive, and
+the body is passed to the client chunk by chunk. Memory per download stays
+bounded by DOWNLOAD_CHUNK_SIZE no matter how large the image is.
+
+Files already on disk (the download cache or MEDIA_ROOT) are served with
+ETag validation and single-range ``Range`` support for resumed downloads.
+
+With DOWNLOAD_OFFLOAD set to ``'x-accel'`` (nginx) or ``'x-sendfile'``
+(Apache/lighttpd), Django only answers with an internal-redirect header
+and the front proxy sends the bytes; see deploy/nginx/downloads.conf.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote, urlparse
+
+import requests
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from requests.adapters import HTTPAdapter
+
+from .upstream import upstream_guard
+
+DOWNLOAD_CHUNK_SIZE = getattr(settings, 'DOWNLOAD_CHUNK_SIZE', 64 * 1024)
+
+# (connect, read) timeouts for upstream image hosts; the read timeout is the
+# longest silence tolerated between chunks, so a hung host frees the worker soon
+DOWNLOAD_TIMEOUT = getattr(settings, 'DOWNLOAD_TIMEOUT', (5, 10))
+
+# Internal nginx locations mapped to MEDIA_ROOT, the download cache and
+# upstream image hosts
+DOWNLOAD_ACCEL_MEDIA_PREFIX = getattr(settings, 'DOWNLOAD_ACCEL_MEDIA_PREFIX', '/internal/media/')
+DOWNLOAD_ACCEL_CACHE_PREFIX = getattr(settings, 'DOWNLOAD_ACCEL_CACHE_PREFIX', '/internal/download-cache/')
+DOWNLOAD_ACCEL_REMOTE_PREFIX = getattr(settings, 'DOWNLOAD_ACCEL_REMOTE_PREFIX', '/internal/remote/')
+
+# Keep-alive pool size per upstream host
+DOWNLOAD_POOL_SIZE = getattr(settings, 'DOWNLOAD_POOL_SIZE', 10)
+
+_session = None
+
+
+def get_session():
+    """Process-wide pooled session for upstream image fetches"""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=DOWNLOAD_POOL_SIZE,
+            pool_maxsize=DOWNLOAD_POOL_SIZE,
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _session = session
+    return _session
+
+
+class UpstreamBody:
+    """Streaming body that owns an open upstream fetch.
+
+    ``StreamingHttpResponse`` calls ``close()`` when it is done with the
+    response, even if the client left before the first chunk, so the host
+    slot, the upstream connection and the cache writer are released there
+    rather than in a generator ``finally`` that may never run.
+    """
+
+    def __init__(self, upstream, host_guard, slot, cache_writer=None):
+        self.upstream = upstream
+        self.host_guard = host_guard
+        self.slot = slot
+        self.cache_writer = cache_writer
+        self._completed = False
+        self._failed = False
+        self._closed = False
+
+    def __iter__(self):
+        try:
+            for chunk in self.upstream.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if chunk:
+                    if self.cache_writer:
+                        self.cache_writer.write(chunk)
+                    yield chunk
+            self._completed = True
+        except requests.RequestException:
+            self._failed = True
+            raise
+        finally:
+            self.close()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        # Hand the connection back to the pool (or drop it if unfinished)
+        self.upstream.close()
+        # A client that went away says nothing about the host's health
+        outcome = True if self._failed else (False if self._completed else None)
+        self.host_guard.release(self.slot, failed=outcome)
+        if self.cache_writer:
+            if self._completed:
+                self.cache_writer.commit()
+            else:
+                self.cache_writer.abort()
+
+
+def stream_remote_image(image_url, filename, cache=None):
+    """Proxy an upstream image as a streaming attachment.
+
+    With ``cache`` given, the body is also written to the download cache
+    and published there once it has been received in full.
+
+    The fetch holds one of the host's bulkhead slots until the response
+    is closed.
+
+    Raises ``requests.RequestException`` if the upstream can't be reached,
+    answers with an error, or is refused by its bulkhead or breaker, before
+    any bytes are sent to the client.
+    """
+    host_guard = upstream_guard.for_url(image_url)
+    slot = host_guard.acquire()
+    try:
+        upstream = get_session().get(image_url, stream=True, timeout=DOWNLOAD_TIMEOUT)
+    except requests.RequestException:
+        host_guard.release(slot, failed=True)
+        raise
+    try:
+        upstream.raise_for_status()
+    except requests.RequestException:
+        upstream.close()
+        # A 404 says nothing about the host's health; 5xx does
+        host_guard.release(slot, failed=upstream.status_code >= 500)
+        raise
+
+    # iter_content decodes any Content-Encoding, so the length only holds without one
+    content_length = None
+    if 'Content-Length' in upstream.headers and 'Content-Encoding' not in upstream.headers:
+        content_length = int(upstream.headers['Content-Length'])
+
+    cache_writer = cache.writer(image_url, content_length) if cache else None
+
+    response = StreamingHttpResponse(
+        UpstreamBody(upstream, host_guard, slot, cache_writer),
+        content_type=upstream.headers.get('Content-Type', 'image/jpeg'),
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    if content_length is not None:
+        response['Content-Length'] = content_length
+    return response
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """Parse a single-range ``Range`` header into inclusive (start, end).
+
+    Returns None when the header should be ignored (missing, malformed or
+    multi-range) and raises ValueError when the range can't be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('Unsatisfiable range')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Unsatisfiable range')
+    return start, end
+
+
+def is_resumed_request(request):
+    """True for Range requests that continue an earlier download"""
+    match = RANGE_RE.match(request.headers.get('Range', '').strip())
+    return bool(match and match.group(1) and int(match.group(1)) > 0)
+
+
+def _iter_file_range(file_path, start, length):
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def serve_file(request, file_path, size, etag, content_type, filename):
+    """Serve a file on disk with ETag, If-None-Match and Range support"""
+    if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if not if_range or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _iter_file_range(file_path, start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = length
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    else:
+        response = FileResponse(
+            open(file_path, 'rb'),
+            as_attachment=True,
+            filename=filename,
+            content_type=content_type,
+        )
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    return response
+
+
+def serve_cached_image(request, cached, filename, cache_root):
+    """Serve a download cache hit"""
+    offloaded = offload_file(
+        cached.path, filename, cached.content_type, cache_root, DOWNLOAD_ACCEL_CACHE_PREFIX
+    )
+    if offloaded:
+        return offloaded
+    return serve_file(request, cached.path, cached.size, cached.etag, cached.content_type, filename)
+
+
+def local_image_path(image_url):
+    """Absolute path of a MEDIA_ROOT image, or None if it isn't there"""
+    media_root = os.path.abspath(settings.MEDIA_ROOT)
+    file_path = os.path.abspath(os.path.join(media_root, image_url.lstrip('/')))
+    if os.path.commonpath([media_root, file_path]) != media_root:
+        return None
+    if not os.path.isfile(file_path):
+        return None
+    return file_path
+
+
+def serve_local_image(request, file_path, filename):
+    """Send a local MEDIA_ROOT file as an attachment"""
+    content_type = mimetypes.guess_type(filename)[0] or 'image/jpeg'
+    offloaded = offload_file(
+        file_path, filename, content_type, settings.MEDIA_ROOT, DOWNLOAD_ACCEL_MEDIA_PREFIX
+    )
+    if offloaded:
+        return offloaded
+    stat = os.stat(file_path)
+    etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+    return serve_file(request, file_path, stat.st_size, etag, content_type, filename)
+
+
+def offload_mode():
+    """'' (serve from Django), 'x-accel' (nginx) or 'x-sendfile'"""
+    return getattr(settings, 'DOWNLOAD_OFFLOAD', '') or ''
+
+
+def _offload_response(header, value, filename, content_type):
+    response = HttpResponse(content_type=content_type)
+    response[header] = value
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def offload_file(file_path, filename, content_type, root, accel_prefix):
+    """Internal-redirect response for a file under ``root``, or None if offload is off"""
+    mode = offload_mode()
+    if mode == 'x-sendfile':
+        return _offload_response('X-Sendfile', file_path, filename, content_type)
+    if mode == 'x-accel':
+        relative = os.path.relpath(file_path, os.path.abspath(root)).replace(os.sep, '/')
+        location = accel_prefix.rstrip('/') + '/' + quote(relative)
+        return _offload_response('X-Accel-Redirect', location, filename, content_type)
+    return None
+
+
+def offload_remote(image_url, filename):
+    """Have nginx proxy an upstream image itself; None if not possible"""
+    if offload_mode() != 'x-accel':
+        # X-Sendfile can only send local files
+        return None
+    parsed = urlparse(image_url)
+    location = f'{DOWNLOAD_ACCEL_REMOTE_PREFIX.rstrip("/")}/{parsed.scheme}/{parsed.netloc}{parsed.path}'
+    if parsed.query:
+        location += f'?{parsed.query}'
+    content_type = mimetypes.guess_type(parsed.path)[0] or 'image/jpeg'
+    return _offload_response('X-Accel-Redirect', location, filename, content_type)
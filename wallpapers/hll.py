@@ -0,0 +1,100 @@
+# wallpapers/hll.py
+"""HyperLogLog sketches for approximate distinct counts.
+
+A sketch is 2**PRECISION one-byte registers (1 KiB at the default
+precision, about 3% standard error). Adding a value sets the register
+chosen by the top bits of its 64-bit hash to the position of the first
+set bit in the remaining bits, if that is higher. The union of two
+sketches is the register-wise maximum, so daily per-wallpaper sketches
+merge into any date range or any set of wallpapers without touching the
+raw events.
+
+Stored sketches use a sparse encoding (index/rank pairs) while few
+registers are set, which is the common case for a single wallpaper-day.
+"""
+
+import hashlib
+import math
+
+PRECISION = 10
+REGISTERS = 1 << PRECISION
+HASH_BITS = 64
+ALPHA = 0.7213 / (1 + 1.079 / REGISTERS)
+
+DENSE = b'\x00'
+SPARSE = b'\x01'
+
+
+def hash_value(value):
+    """64-bit hash of a string"""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch"""
+
+    __slots__ = ('registers',)
+
+    def __init__(self, registers=None):
+        self.registers = bytearray(registers) if registers else bytearray(REGISTERS)
+
+    def add(self, value):
+        hashed = hash_value(value)
+        index = hashed >> (HASH_BITS - PRECISION)
+        rest = hashed & ((1 << (HASH_BITS - PRECISION)) - 1)
+        rank = HASH_BITS - PRECISION - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, other):
+        """Merge ``other`` (a sketch or its stored bytes) into this one"""
+        if not isinstance(other, HyperLogLog):
+            other = HyperLogLog.from_bytes(other)
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        """Estimated number of distinct values added"""
+        zeros = self.registers.count(0)
+        if zeros == REGISTERS:
+            return 0
+        estimate = ALPHA * REGISTERS * REGISTERS / sum(2.0 ** -rank for rank in self.registers)
+        if estimate <= 2.5 * REGISTERS and zeros:
+            # Linear counting is more accurate while registers are mostly empty
+            estimate = REGISTERS * math.log(REGISTERS / zeros)
+        return round(estimate)
+
+    def __len__(self):
+        return self.count()
+
+    def to_bytes(self):
+        """Compact encoding: empty, sparse index/rank pairs or dense registers"""
+        used = [(index, rank) for index, rank in enumerate(self.registers) if rank]
+        if not used:
+            return b''
+        if len(used) * 3 < REGISTERS:
+            return SPARSE + b''.join(
+                index.to_bytes(2, 'big') + bytes((rank,)) for index, rank in used
+            )
+        return DENSE + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = bytes(data or b'')
+        if not data:
+            return cls()
+        if data[:1] == DENSE:
+            return cls(data[1:])
+        sketch = cls()
+        for offset in range(1, len(data), 3):
+            sketch.registers[int.from_bytes(data[offset:offset + 2], 'big')] = data[offset + 2]
+        return sketch
+
+
+def merge(sketches):
+    """Union of stored sketches"""
+    merged = HyperLogLog()
+    for data in sketches:
+        if data:
+            merged.update(data)
+    return merged
@@ -0,0 +1,261 @@
+# wallpapers/hot.py
+"""Streaming "hot right now" tracker.
+
+Each worker counts engagement (downloads, detail views, likes) in a
+Count-Min sketch and keeps its heaviest wallpapers in a top-K min-heap.
+Both live for one HOT_SLOT_SECONDS time slot and have a fixed size, so
+memory does not depend on traffic: HOT_SKETCH_DEPTH x HOT_SKETCH_WIDTH
+counters plus HOT_TOP_K heap entries.
+
+Every HOT_PUBLISH_INTERVAL seconds a background thread publishes the
+worker's top-K estimates for the current (and just-finished) slot into a
+shared cache entry per slot, under the worker's own key, so republishing
+replaces rather than double counts. ``hot_wallpaper_ids()`` sums the published slots of the
+last HOT_WINDOW_SECONDS across workers.
+"""
+
+import atexit
+import hashlib
+import heapq
+import logging
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+from .models import DesktopWallpaper
+
+logger = logging.getLogger(__name__)
+
+HOT_ENABLED = getattr(settings, 'HOT_ENABLED', True)
+HOT_SLOT_SECONDS = getattr(settings, 'HOT_SLOT_SECONDS', 300)
+HOT_WINDOW_SECONDS = getattr(settings, 'HOT_WINDOW_SECONDS', 3600)
+HOT_PUBLISH_INTERVAL = getattr(settings, 'HOT_PUBLISH_INTERVAL', 10)
+HOT_SKETCH_WIDTH = getattr(settings, 'HOT_SKETCH_WIDTH', 2048)
+HOT_SKETCH_DEPTH = getattr(settings, 'HOT_SKETCH_DEPTH', 4)
+HOT_TOP_K = getattr(settings, 'HOT_TOP_K', 50)
+
+# Points per event
+HOT_WEIGHTS = getattr(settings, 'HOT_WEIGHTS', {
+    'download': 5,
+    'like': 3,
+    'view': 1,
+})
+
+SLOT_KEY = 'hot:slot:{}'
+LOCK_KEY = 'hot:lock'
+LOCK_TIMEOUT = 5
+
+
+class CountMinSketch:
+    """Fixed-size frequency estimates that never undercount"""
+
+    def __init__(self, width=HOT_SKETCH_WIDTH, depth=HOT_SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.rows = [[0] * width for _ in range(depth)]
+
+    def _columns(self, key):
+        digest = hashlib.blake2b(str(key).encode(), digest_size=4 * self.depth).digest()
+        return [
+            int.from_bytes(digest[4 * row:4 * row + 4], 'big') % self.width
+            for row in range(self.depth)
+        ]
+
+    def add(self, key, count=1):
+        """Count ``key`` and return its new estimate"""
+        estimate = None
+        for row, column in zip(self.rows, self._columns(key)):
+            row[column] += count
+            estimate = row[column] if estimate is None else min(estimate, row[column])
+        return estimate
+
+    def estimate(self, key):
+        return min(row[column] for row, column in zip(self.rows, self._columns(key)))
+
+    def clear(self):
+        for row in self.rows:
+            row[:] = [0] * self.width
+
+
+class TopK:
+    """The ``k`` keys with the highest estimates, as a min-heap"""
+
+    def __init__(self, k=HOT_TOP_K):
+        self.k = k
+        self._heap = []
+        self._entries = {}
+
+    def offer(self, key, estimate):
+        entry = self._entries.get(key)
+        if entry is not None:
+            # Estimates only grow, so the entry can only sink towards the leaves
+            entry[0] = estimate
+            heapq.heapify(self._heap)
+        elif len(self._heap) < self.k:
+            entry = self._entries[key] = [estimate, key]
+            heapq.heappush(self._heap, entry)
+        elif estimate > self._heap[0][0]:
+            entry = self._entries[key] = [estimate, key]
+            evicted = heapq.heapreplace(self._heap, entry)
+            del self._entries[evicted[1]]
+
+    def items(self):
+        """``{key: estimate}``"""
+        return {key: entry[0] for key, entry in self._entries.items()}
+
+    def clear(self):
+        self._heap = []
+        self._entries = {}
+
+
+def current_slot(now=None):
+    return int((now or time.time()) // HOT_SLOT_SECONDS)
+
+
+def window_slots(now=None):
+    """Slots covering the last HOT_WINDOW_SECONDS, newest first"""
+    slot = current_slot(now)
+    count = max(1, HOT_WINDOW_SECONDS // HOT_SLOT_SECONDS)
+    return [slot - offset for offset in range(count)]
+
+
+class HotTracker:
+    """Per-process heavy-hitter tracker for the current time slot"""
+
+    def __init__(self, interval=HOT_PUBLISH_INTERVAL, enabled=HOT_ENABLED):
+        self.interval = interval
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._sketch = CountMinSketch()
+        self._top = TopK()
+        self._slot = current_slot()
+        self._dirty = False
+        # Estimates of the slot that just ended, until published
+        self._finished = None
+        self._thread = None
+        self._stats = {'events': 0, 'published': 0, 'skipped': 0, 'failed': 0}
+
+    def record(self, wallpaper_id, event):
+        """Count one engagement event (``HOT_WEIGHTS`` key); never blocks on I/O"""
+        if not self.enabled:
+            return
+        weight = HOT_WEIGHTS.get(event, 1)
+        with self._lock:
+            self._rotate(current_slot())
+            estimate = self._sketch.add(wallpaper_id, weight)
+            self._top.offer(wallpaper_id, estimate)
+            self._dirty = True
+            self._stats['events'] += 1
+        self._ensure_thread()
+
+    def _rotate(self, slot):
+        # Caller holds the lock
+        if slot == self._slot:
+            return
+        if self._dirty:
+            self._finished = (self._slot, self._top.items())
+        self._slot = slot
+        self._sketch.clear()
+        self._top.clear()
+        self._dirty = False
+
+    @property
+    def worker(self):
+        # Read at publish time: forked workers must not share the parent's key
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    def metrics(self):
+        with self._lock:
+            return dict(self._stats, slot=self._slot, tracked=len(self._top.items()))
+
+    def publish(self):
+        """Share this worker's estimates for the finished and current slots"""
+        with self._lock:
+            self._rotate(current_slot())
+            finished, self._finished = self._finished, None
+            current = (self._slot, self._top.items()) if self._dirty else None
+            self._dirty = False
+
+        if finished and not self._write(*finished):
+            with self._lock:
+                if self._finished is None:
+                    self._finished = finished
+        if current and not self._write(*current):
+            with self._lock:
+                if current[0] == self._slot:
+                    self._dirty = True
+
+    def _write(self, slot, estimates):
+        """Merge into the slot's cache entry; False if it should be retried"""
+        key = SLOT_KEY.format(slot)
+        try:
+            # add() is atomic on shared backends; a busy lock retries next round
+            if not cache.add(LOCK_KEY, 1, LOCK_TIMEOUT):
+                self._stats['skipped'] += 1
+                return False
+            try:
+                workers = cache.get(key) or {}
+                workers[self.worker] = estimates
+                cache.set(key, workers, HOT_WINDOW_SECONDS + HOT_SLOT_SECONDS)
+            finally:
+                cache.delete(LOCK_KEY)
+        except Exception as e:
+            self._stats['failed'] += 1
+            logger.error(f"Hot tracker publish failed: {e}")
+            return False
+        self._stats['published'] += 1
+        return True
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='hot-publish', daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.publish)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.publish()
+
+
+def hot_scores(now=None):
+    """``{wallpaper_id: score}`` over the window, summed across workers"""
+    keys = [SLOT_KEY.format(slot) for slot in window_slots(now)]
+    scores = {}
+    for workers in cache.get_many(keys).values():
+        for estimates in workers.values():
+            for wallpaper_id, estimate in estimates.items():
+                scores[wallpaper_id] = scores.get(wallpaper_id, 0) + estimate
+    return scores
+
+
+def hot_wallpaper_ids(limit=12, now=None):
+    """Ids of the hottest wallpapers right now, hottest first"""
+    scores = hot_scores(now)
+    return heapq.nlargest(limit, scores, key=lambda wallpaper_id: (scores[wallpaper_id], wallpaper_id))
+
+
+def hot_wallpapers(limit=12):
+    """Hottest desktop wallpapers, cached for one publish interval"""
+    def build():
+        ids = hot_wallpaper_ids(limit)
+        wallpapers = DesktopWallpaper.objects.in_bulk(ids)
+        return [wallpapers[pk] for pk in ids if pk in wallpapers]
+
+    return cache.get_or_set(f'hot:wallpapers:{limit}', build, HOT_PUBLISH_INTERVAL)
+
+
+hot_tracker = HotTracker()
+
+metrics.register('hot', hot_tracker.metrics)
@@ -0,0 +1,84 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+
+from wallpapers.models import DesktopWallpaper
+from wallpapers.serializers import LIST_SERIALIZER, WallpaperSerializer, compact_json_response
+
+
+def _model_page(queryset):
+    """The previous approach: full model instances and hand-built dicts"""
+    wallpaper_list = []
+    for wallpaper in queryset:
+        wallpaper_list.append({
+            'id': wallpaper.id,
+            'title': wallpaper.title,
+            'thumbnail_url': wallpaper.thumbnail_url,
+            'image_url': wallpaper.image_url,
+            'resolution_width': wallpaper.resolution_width,
+            'resolution_height': wallpaper.resolution_height,
+            'quality_label': wallpaper.quality_label,
+            'likes_count': wallpaper.likes_count,
+            'favorites_count': wallpaper.favorites_count,
+            'downloads_count': wallpaper.downloads_count,
+            'is_trending': wallpaper.is_trending,
+            'created_at': wallpaper.created_at.isoformat() if wallpaper.created_at else None,
+        })
+    return JsonResponse({'wallpapers': wallpaper_list}).content
+
+
+def _values_page(queryset, serializer):
+    rows = serializer.queryset(queryset)
+    return compact_json_response({'wallpapers': serializer.rows(rows)}).content
+
+
+class Command(BaseCommand):
+    help = "Compare per-page serialization time and payload size of the wallpaper list API"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=20, help='Pages to serialize per run')
+        parser.add_argument('--per-page', type=int, default=24)
+        parser.add_argument('--fields', default='', help='Projection to measure, e.g. id,thumbnail_url')
+
+    def handle(self, *args, **options):
+        pages = options['pages']
+        per_page = options['per_page']
+        serializer = LIST_SERIALIZER
+        if options['fields']:
+            fields = [field for field in LIST_SERIALIZER.fields if field in options['fields'].split(',')]
+            serializer = WallpaperSerializer(fields)
+
+        total = DesktopWallpaper.objects.count()
+        if not total:
+            self.stdout.write(self.style.WARNING("No wallpapers to benchmark"))
+            return
+
+        ordered = DesktopWallpaper.objects.order_by('-created_at', '-id')
+        slices = [
+            ordered[start:start + per_page]
+            for start in range(0, min(total, pages * per_page), per_page)
+        ]
+
+        results = {}
+        for label, render in (
+            ('model objects', _model_page),
+            ('values() + compact', lambda queryset: _values_page(queryset, serializer)),
+        ):
+            elapsed = 0.0
+            size = 0
+            for queryset in slices:
+                started = time.perf_counter()
+                size += len(render(queryset.all()))
+                elapsed += time.perf_counter() - started
+            results[label] = (elapsed / len(slices) * 1000, size / len(slices))
+
+        for label, (ms, size) in results.items():
+            self.stdout.write(f"{label:>20}: {ms:7.2f} ms/page, {size:9.0f} bytes/page")
+
+        (old_ms, old_size), (new_ms, new_size) = results.values()
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(slices)} pages of {per_page}: "
+            f"{(1 - new_ms / old_ms) * 100:.0f}% faster, "
+            f"{(1 - new_size / old_size) * 100:.0f}% smaller"
+        ))
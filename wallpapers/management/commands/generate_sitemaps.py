@@ -0,0 +1,28 @@
+from django.contrib.sites.models import Site
+from django.core.management.base import BaseCommand
+
+from wallpapers import sitemap_files
+
+
+class Command(BaseCommand):
+    help = "Write gzipped wallpaper sitemap sections, rewriting only the ones that changed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--domain',
+            help='Domain for sitemap URLs (defaults to the current Site)',
+        )
+        parser.add_argument(
+            '--force', action='store_true', help='Rewrite every section',
+        )
+
+    def handle(self, *args, **options):
+        domain = options['domain'] or Site.objects.get_current().domain
+        base_url = f'{sitemap_files.SITEMAP_PROTOCOL}://{domain}'
+
+        written, removed, total = sitemap_files.generate(base_url, force=options['force'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} sections in {sitemap_files.SITEMAP_DIR}: "
+            f"{written} written, {total - written} unchanged, {removed} removed"
+        ))
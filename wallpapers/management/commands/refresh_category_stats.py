@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from wallpapers.cache import bump_catalog_version
+from wallpapers.models import Category
+
+
+class Command(BaseCommand):
+    help = "Recompute each category's denormalized desktop wallpaper stats"
+
+    def handle(self, *args, **options):
+        categories = Category.objects.all()
+        for category in categories:
+            category.refresh_desktop_stats()
+            self.stdout.write(
+                f"{category.name}: {category.desktop_wallpaper_count} wallpapers, "
+                f"{category.desktop_downloads_count} downloads, "
+                f"{category.desktop_likes_count} likes"
+            )
+        
+        # Counts feed the header and home page caches
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {categories.count()} categories"))
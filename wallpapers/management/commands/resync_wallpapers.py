@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+
+from wallpapers.cache import bump_catalog_version
+from wallpapers.models import (
+    Category,
+    DesktopWallpaper,
+    DesktopWallpaperTag,
+    MobileWallpaper,
+    MobileWallpaperTag,
+    sync_wallpaper_tags,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild tag links, tag counts, palette colors and category stats for wallpapers "
+        "written without save(), e.g. by raw SQL imports"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desktop-after', type=int, default=0,
+            help='Only desktop wallpapers with a higher id',
+        )
+        parser.add_argument(
+            '--mobile-after', type=int, default=0,
+            help='Only mobile wallpapers with a higher id',
+        )
+
+    def handle(self, *args, **options):
+        desktop = 0
+        category_ids = set()
+        wallpapers = DesktopWallpaper.objects.filter(id__gt=options['desktop_after']).only(
+            'id', 'category_id', 'tags', 'color_palette'
+        )
+        for wallpaper in wallpapers.order_by('id').iterator(chunk_size=500):
+            sync_wallpaper_tags(wallpaper, DesktopWallpaperTag, 'desktop_wallpaper_count')
+            wallpaper.sync_palette_colors()
+            category_ids.add(wallpaper.category_id)
+            desktop += 1
+
+        # Seeded download and like counts never reached the category totals
+        for category in Category.objects.filter(id__in=category_ids):
+            category.refresh_desktop_stats()
+
+        mobile = 0
+        wallpapers = MobileWallpaper.objects.filter(id__gt=options['mobile_after']).only('id', 'tags')
+        for wallpaper in wallpapers.order_by('id').iterator(chunk_size=500):
+            sync_wallpaper_tags(wallpaper, MobileWallpaperTag, 'mobile_wallpaper_count')
+            mobile += 1
+
+        # Tag pages, facets, color search and category counts are cached per catalog version
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"Resynced {desktop} desktop and {mobile} mobile wallpapers"
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from wallpapers import rollups
+
+
+class Command(BaseCommand):
+    help = "Roll up new download events into daily totals and prune expired raw rows"
+
+    def handle(self, *args, **options):
+        days, written, deleted = rollups.rollup_downloads()
+
+        retention = rollups.DOWNLOAD_ANALYTICS_RETENTION_DAYS
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {days} day{'s' if days != 1 else ''} ({written} rows); "
+            f"pruned {deleted} raw rows"
+            + (f" older than {retention} days" if retention else " (retention off)")
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from wallpapers import trending
+
+
+class Command(BaseCommand):
+    help = "Add decayed scores for engagement since the last run and reflag trending wallpapers"
+
+    def handle(self, *args, **options):
+        summary = trending.update_trending()
+
+        if summary['rebaselined']:
+            self.stdout.write("Weights changed: counters re-baselined")
+        if summary['rebased']:
+            self.stdout.write("Landmark moved forward: scores rescaled")
+        for wallpaper_type in trending.TRENDING_MODELS:
+            self.stdout.write(f"{wallpaper_type}: {summary[wallpaper_type]} wallpapers scored")
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed downloads up to #{summary['last_id']}; "
+            f"top {trending.TRENDING_TOP_K} {'changed' if summary['changed'] else 'unchanged'}"
+        ))
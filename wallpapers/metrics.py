@@ -0,0 +1,26 @@
+# wallpapers/metrics.py
+"""Tiny registry of in-process metrics providers.
+
+Components register a callable returning a dict; ``snapshot()`` collects
+them all for the metrics endpoint. Values are per worker process.
+"""
+
+import os
+
+_providers = {}
+
+
+def register(name, provider):
+    """Expose ``provider()`` under ``name`` in metric snapshots"""
+    _providers[name] = provider
+
+
+def snapshot():
+    """Current values from every registered provider"""
+    data = {'pid': os.getpid()}
+    for name, provider in sorted(_providers.items()):
+        try:
+            data[name] = provider()
+        except Exception as e:
+            data[name] = {'error': str(e)}
+    return data
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallpapers', '0003_wallpaperreport'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='desktopwallpaper',
+            index=models.Index(fields=['-created_at', '-id'], name='wallpapers__created_c5aed5_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:52
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_desktop_stats(apps, schema_editor):
+    Category = apps.get_model('wallpapers', 'Category')
+    DesktopWallpaper = apps.get_model('wallpapers', 'DesktopWallpaper')
+    stats = DesktopWallpaper.objects.values('category_id').annotate(
+        wallpapers=Count('id'),
+        downloads=Sum('downloads_count'),
+        likes=Sum('likes_count'),
+    )
+    for row in stats:
+        Category.objects.filter(id=row['category_id']).update(
+            desktop_wallpaper_count=row['wallpapers'],
+            desktop_downloads_count=row['downloads'] or 0,
+            desktop_likes_count=row['likes'] or 0,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallpapers', '0004_desktopwallpaper_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='desktop_downloads_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='desktop_likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_desktop_stats, migrations.RunPython.noop),
+    ]
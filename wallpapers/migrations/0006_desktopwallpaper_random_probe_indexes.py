@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallpapers', '0005_category_desktop_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='desktopwallpaper',
+            index=models.Index(fields=['category', 'id'], name='wallpapers__categor_0280d7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='desktopwallpaper',
+            index=models.Index(fields=['quality_label', 'id'], name='wallpapers__quality_1229f9_idx'),
+        ),
+    ]
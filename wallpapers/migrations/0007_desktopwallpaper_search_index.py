@@ -0,0 +1,75 @@
+# Full-text search index for DesktopWallpaper title and tags
+
+from django.db import migrations
+
+FTS_TABLE = 'wallpapers_desktopwallpaper_fts'
+
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, tags,
+        content='wallpapers_desktopwallpaper', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON wallpapers_desktopwallpaper BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, tags) VALUES (new.id, new.title, new.tags);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON wallpapers_desktopwallpaper BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, tags) VALUES ('delete', old.id, old.title, old.tags);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF title, tags ON wallpapers_desktopwallpaper BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, tags) VALUES ('delete', old.id, old.title, old.tags);
+        INSERT INTO {FTS_TABLE}(rowid, title, tags) VALUES (new.id, new.title, new.tags);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+# Keep in sync with wallpapers.search.PG_DOCUMENT
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX wallpapers_desktopwallpaper_search_idx ON wallpapers_desktopwallpaper USING GIN ((
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', replace(coalesce(tags, ''), ',', ' ')), 'B')
+    ))
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS wallpapers_desktopwallpaper_search_idx",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        statements = statements_by_vendor.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallpapers', '0006_desktopwallpaper_random_probe_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            _run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}),
+        ),
+    ]
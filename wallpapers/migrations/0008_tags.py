@@ -0,0 +1,135 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:04
+
+import django.db.models.deletion
+import importlib
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils.text import slugify
+
+
+def restore_search_triggers(apps, schema_editor):
+    # Adding the M2M field rebuilds wallpapers_desktopwallpaper on SQLite,
+    # which drops the full-text triggers created by 0007
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    search_index = importlib.import_module(
+        'wallpapers.migrations.0007_desktopwallpaper_search_index'
+    )
+    # Triggers and a rebuild; the FTS table itself survives
+    for statement in search_index.SQLITE_FORWARD[1:]:
+        schema_editor.execute(statement)
+
+
+def _split_tags(value):
+    tags = {}
+    for name in (value or '').split(','):
+        name = ' '.join(name.split())
+        slug = slugify(name, allow_unicode=True)[:100]
+        if slug and slug not in tags:
+            tags[slug] = name[:100]
+    return tags
+
+
+def _link_existing(Tag, Wallpaper, Link, tag_ids):
+    links = []
+    rows = Wallpaper.objects.exclude(tags='').values_list('id', 'tags').iterator(chunk_size=2000)
+    for wallpaper_id, tags in rows:
+        for slug, name in _split_tags(tags).items():
+            if slug not in tag_ids:
+                tag_ids[slug] = Tag.objects.create(slug=slug, name=name).id
+            links.append(Link(wallpaper_id=wallpaper_id, tag_id=tag_ids[slug]))
+        if len(links) >= 5000:
+            Link.objects.bulk_create(links, ignore_conflicts=True)
+            links = []
+    Link.objects.bulk_create(links, ignore_conflicts=True)
+
+
+def split_existing_tags(apps, schema_editor):
+    Tag = apps.get_model('wallpapers', 'Tag')
+    tag_ids = {}
+    _link_existing(
+        Tag, apps.get_model('wallpapers', 'DesktopWallpaper'),
+        apps.get_model('wallpapers', 'DesktopWallpaperTag'), tag_ids,
+    )
+    _link_existing(
+        Tag, apps.get_model('wallpapers', 'MobileWallpaper'),
+        apps.get_model('wallpapers', 'MobileWallpaperTag'), tag_ids,
+    )
+
+    for field, relation in (
+        ('desktop_wallpaper_count', 'desktop_links'),
+        ('mobile_wallpaper_count', 'mobile_links'),
+    ):
+        for row in Tag.objects.annotate(n=Count(relation)).values('id', 'n'):
+            if row['n']:
+                Tag.objects.filter(id=row['id']).update(**{field: row['n']})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallpapers', '0007_desktopwallpaper_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(allow_unicode=True, max_length=100, unique=True)),
+                ('desktop_wallpaper_count', models.PositiveIntegerField(default=0)),
+                ('mobile_wallpaper_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['-desktop_wallpaper_count'], name='wallpapers__desktop_3e70cb_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MobileWallpaperTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wallpaper', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='wallpapers.mobilewallpaper')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mobile_links', to='wallpapers.tag')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DesktopWallpaperTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wallpaper', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='wallpapers.desktopwallpaper')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='desktop_links', to='wallpapers.tag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='desktopwallpaper',
+            name='tag_objects',
+            field=models.ManyToManyField(blank=True, related_name='desktop_wallpapers', through='wallpapers.DesktopWallpaperTag', to='wallpapers.tag'),
+        ),
+        migrations.AddField(
+            model_name='mobilewallpaper',
+            name='tag_objects',
+            field=models.ManyToManyField(blank=True, related_name='mobile_wallpapers', through='wallpapers.MobileWallpaperTag', to='wallpapers.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='mobilewallpapertag',
+            index=models.Index(fields=['tag', '-wallpaper'], name='wallpapers__tag_id_99cf03_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='mobilewallpapertag',
+            constraint=models.UniqueConstraint(fields=('wallpaper', 'tag'), name='unique_mobile_wallpaper_tag'),
+        ),
+        migrations.AddIndex(
+            model_name='desktopwallpapertag',
+            index=models.Index(fields=['tag', '-wallpaper'], name='wallpapers__tag_id_c5c85e_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='desktopwallpapertag',
+            constraint=models.UniqueConstraint(fields=('wallpaper', 'tag'), name='unique_desktop_wallpaper_tag'),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+        migrations.RunPython(split_existing_tags, migrations.RunPython.noop),
+    ]
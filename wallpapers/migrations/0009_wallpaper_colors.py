@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def index_palettes(apps, schema_editor):
+    # Pure helper: hex parsing and bucketing only, no model access
+    from wallpapers.colors import palette_buckets
+
+    DesktopWallpaper = apps.get_model('wallpapers', 'DesktopWallpaper')
+    WallpaperColor = apps.get_model('wallpapers', 'WallpaperColor')
+    colors = []
+    rows = DesktopWallpaper.objects.values_list('id', 'color_palette').iterator(chunk_size=2000)
+    for wallpaper_id, palette in rows:
+        for position, bucket in palette_buckets(palette).items():
+            colors.append(WallpaperColor(wallpaper_id=wallpaper_id, position=position, bucket=bucket))
+        if len(colors) >= 5000:
+            WallpaperColor.objects.bulk_create(colors)
+            colors = []
+    WallpaperColor.objects.bulk_create(colors)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallpapers', '0008_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WallpaperColor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('bucket', models.PositiveSmallIntegerField()),
+                ('wallpaper', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='palette_colors', to='wallpapers.desktopwallpaper')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket', 'position', 'wallpaper'], name='wallpapers__bucket_f1ef1d_idx')],
+                'constraints': [models.UniqueConstraint(fields=('wallpaper', 'position'), name='unique_wallpaper_color_position')],
+            },
+        ),
+        migrations.RunPython(index_palettes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:10
+
+import importlib
+
+from django.db import migrations, models
+
+
+def restore_search_triggers(apps, schema_editor):
+    # The new columns rebuild wallpapers_desktopwallpaper on SQLite too
+    tags = importlib.import_module('wallpapers.migrations.0008_tags')
+    tags.restore_search_triggers(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallpapers', '0009_wallpaper_colors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.PositiveBigIntegerField(default=0, help_text='Last event id processed')),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='desktopwallpaper',
+            name='trending_engagement_seen',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='desktopwallpaper',
+            name='trending_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='mobilewallpaper',
+            name='trending_engagement_seen',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='mobilewallpaper',
+            name='trending_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='desktopwallpaper',
+            name='trending_percentage',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Trending score relative to the top wallpaper'),
+        ),
+        migrations.AlterField(
+            model_name='mobilewallpaper',
+            name='trending_percentage',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Trending score relative to the top wallpaper'),
+        ),
+        migrations.AddIndex(
+            model_name='desktopwallpaper',
+            index=models.Index(fields=['-trending_score'], name='wallpapers__trendin_1aa6d9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mobilewallpaper',
+            index=models.Index(fields=['-trending_score'], name='wallpapers__trendin_09e998_idx'),
+        ),
+    ]
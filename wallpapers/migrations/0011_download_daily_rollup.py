@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallpapers', '0010_trending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DownloadDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('wallpaper_type', models.CharField(choices=[('desktop', 'Desktop'), ('mobile', 'Mobile')], max_length=10)),
+                ('wallpaper_id', models.PositiveIntegerField()),
+                ('device_type', models.CharField(choices=[('desktop', 'Desktop'), ('mobile', 'Mobile')], help_text="User's device type", max_length=10)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('unique_ip_hashes', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Download Daily Rollups',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['wallpaper_type', 'wallpaper_id', 'date'], name='wallpapers__wallpap_974dd8_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'wallpaper_type', 'wallpaper_id', 'device_type'), name='unique_download_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:14
+
+from django.db import migrations, models
+
+
+def rerun_rollup(apps, schema_editor):
+    # Existing rollup rows have no sketch; the next rollup_downloads run
+    # recomputes every day still in the raw table
+    JobCheckpoint = apps.get_model('wallpapers', 'JobCheckpoint')
+    JobCheckpoint.objects.filter(name='download_rollup').update(last_id=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallpapers', '0011_download_daily_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='downloaddailyrollup',
+            name='ip_sketch',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+        migrations.RunPython(rerun_rollup, migrations.RunPython.noop),
+    ]
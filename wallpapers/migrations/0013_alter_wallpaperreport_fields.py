@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallpapers', '0012_download_rollup_sketch'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='wallpaperreport',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254, null=True),
+        ),
+        migrations.AlterField(
+            model_name='wallpaperreport',
+            name='report_type',
+            field=models.CharField(choices=[('copyright', 'Copyright infringement'), ('inappropriate', 'Inappropriate content'), ('low_quality', 'Low quality'), ('wrong_category', 'Wrong category'), ('duplicate', 'Duplicate wallpaper'), ('other', 'Other')], max_length=50),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:37
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallpapers', '0013_alter_wallpaperreport_fields'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='downloadanalytics',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -1,13 +1,70 @@
 # wallpapers/models.py
 
-from django.db import models
+from collections import defaultdict
+
+from django.db import connections, models, router, transaction
+from django.db.models.functions import Greatest
+from django.utils import timezone
 from django.utils.text import slugify
 import json
 
 
+COUNTER_MUTATION_FIELDS = ('views_count', 'downloads_count', 'likes_count', 'favorites_count')
+
+
+def mutate_counter(model, pk, field, delta):
+    """Add ``delta`` to a wallpaper counter unless it would go below zero.
+    
+    Returns ``(new_value, category_id, changed)``, or None if the row doesn't
+    exist; ``changed`` is False when a decrement was skipped at zero, so
+    callers can keep denormalized totals in step. The change is a single
+    UPDATE ... RETURNING where the database supports it (PostgreSQL,
+    SQLite 3.35+) and UPDATE + SELECT elsewhere.
+    """
+    if field not in COUNTER_MUTATION_FIELDS:
+        raise ValueError(f'Unknown counter field: {field}')
+    
+    connection = connections[router.db_for_write(model)]
+    if connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_columns_from_insert:
+        qn = connection.ops.quote_name
+        column = qn(model._meta.get_field(field).column)
+        sql = (
+            f'UPDATE {qn(model._meta.db_table)} '
+            f'SET {column} = {column} + %s '
+            f'WHERE {qn(model._meta.pk.column)} = %s AND {column} + %s >= 0 '
+            f'RETURNING {column}, {qn("category_id")}'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [delta, pk, delta])
+            row = cursor.fetchone()
+        if row:
+            return (*row, True)
+    else:
+        updated = model.objects.filter(pk=pk, **{f'{field}__gte': -delta}).update(
+            **{field: models.F(field) + delta}
+        )
+        if updated:
+            return (*model.objects.filter(pk=pk).values_list(field, 'category_id').first(), True)
+    
+    # Missing row, or a decrement at zero
+    row = model.objects.filter(pk=pk).values_list(field, 'category_id').first()
+    return (*row, False) if row else None
+
+
+
+def split_tags(value):
+    """Split a comma-separated tags string into ``{slug: name}``, first spelling wins"""
+    tags = {}
+    for name in (value or '').split(','):
+        name = ' '.join(name.split())
+        slug = slugify(name, allow_unicode=True)[:100]
+        if slug and slug not in tags:
+            tags[slug] = name[:100]
+    return tags
+
+
 
 # models.py - Add this model
-from django.db import models
 
 class WallpaperReport(models.Model):
     """Model for wallpaper reports"""
@@ -59,6 +116,10 @@ class Category(models.Model):
     desktop_wallpaper_count = models.PositiveIntegerField(default=0)
     mobile_wallpaper_count = models.PositiveIntegerField(default=0)
     
+    # Denormalized desktop stats, kept in step with the wallpaper counters
+    desktop_downloads_count = models.PositiveIntegerField(default=0)
+    desktop_likes_count = models.PositiveIntegerField(default=0)
+    
     display_order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     
@@ -80,6 +141,118 @@ class Category(models.Model):
     def get_total_wallpapers(self):
         """Get total wallpapers in this category"""
         return self.desktop_wallpaper_count + self.mobile_wallpaper_count
+    
+    @classmethod
+    def adjust_desktop_stats(cls, category_id, wallpapers=0, downloads=0, likes=0):
+        """Apply deltas to a category's denormalized desktop stats atomically"""
+        updates = {}
+        for field, delta in (
+            ('desktop_wallpaper_count', wallpapers),
+            ('desktop_downloads_count', downloads),
+            ('desktop_likes_count', likes),
+        ):
+            if delta:
+                # Never let a stale counter go below zero
+                updates[field] = Greatest(models.F(field) + delta, 0)
+        if updates:
+            cls.objects.filter(id=category_id).update(**updates)
+    
+    def refresh_desktop_stats(self):
+        """Recompute desktop stats from the wallpapers table"""
+        stats = self.desktop_wallpapers.aggregate(
+            wallpapers=models.Count('id'),
+            downloads=models.Sum('downloads_count'),
+            likes=models.Sum('likes_count'),
+        )
+        self.desktop_wallpaper_count = stats['wallpapers'] or 0
+        self.desktop_downloads_count = stats['downloads'] or 0
+        self.desktop_likes_count = stats['likes'] or 0
+        Category.objects.filter(id=self.id).update(
+            desktop_wallpaper_count=self.desktop_wallpaper_count,
+            desktop_downloads_count=self.desktop_downloads_count,
+            desktop_likes_count=self.desktop_likes_count,
+        )
+# ==================== TAGS ====================
+
+class Tag(models.Model):
+    """Normalized wallpaper tag, parsed from the ``tags`` strings on save"""
+    
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=100, unique=True, allow_unicode=True)
+    
+    # Precomputed facet counts, kept in step as wallpapers are tagged
+    desktop_wallpaper_count = models.PositiveIntegerField(default=0)
+    mobile_wallpaper_count = models.PositiveIntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['name']
+        indexes = [
+            # Popular-tag facets
+            models.Index(fields=['-desktop_wallpaper_count']),
+        ]
+    
+    def __str__(self):
+        return self.name
+    
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = slugify(self.name, allow_unicode=True)
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def for_names(cls, tags):
+        """Get or create the Tag rows for a ``{slug: name}`` dict"""
+        if not tags:
+            return []
+        existing = {tag.slug: tag for tag in cls.objects.filter(slug__in=list(tags))}
+        missing = [cls(slug=slug, name=name) for slug, name in tags.items() if slug not in existing]
+        if missing:
+            cls.objects.bulk_create(missing, ignore_conflicts=True)
+            existing = {tag.slug: tag for tag in cls.objects.filter(slug__in=list(tags))}
+        return list(existing.values())
+    
+    @classmethod
+    def adjust_counts(cls, tag_ids, field, delta):
+        """Apply one delta to a facet count of several tags"""
+        if tag_ids and delta:
+            cls.objects.filter(id__in=list(tag_ids)).update(
+                **{field: Greatest(models.F(field) + delta, 0)}
+            )
+    
+    def refresh_counts(self):
+        """Recompute the facet counts from the link tables"""
+        self.desktop_wallpaper_count = self.desktop_links.count()
+        self.mobile_wallpaper_count = self.mobile_links.count()
+        Tag.objects.filter(id=self.id).update(
+            desktop_wallpaper_count=self.desktop_wallpaper_count,
+            mobile_wallpaper_count=self.mobile_wallpaper_count,
+        )
+
+
+def sync_wallpaper_tags(wallpaper, link_model, count_field):
+    """Make a wallpaper's tag links match its ``tags`` string"""
+    tags = Tag.for_names(split_tags(wallpaper.tags))
+    wanted = {tag.id for tag in tags}
+    current = set(
+        link_model.objects.filter(wallpaper_id=wallpaper.pk).values_list('tag_id', flat=True)
+    )
+    
+    removed = current - wanted
+    if removed:
+        link_model.objects.filter(wallpaper_id=wallpaper.pk, tag_id__in=removed).delete()
+        Tag.adjust_counts(removed, count_field, -1)
+    
+    added = wanted - current
+    if added:
+        link_model.objects.bulk_create(
+            [link_model(wallpaper_id=wallpaper.pk, tag_id=tag_id) for tag_id in added],
+            ignore_conflicts=True,
+        )
+        Tag.adjust_counts(added, count_field, 1)
+
+
 # ==================== UPDATED DESKTOP WALLPAPER MODEL ====================
 
 class DesktopWallpaper(models.Model):
@@ -96,6 +269,12 @@ class DesktopWallpaper(models.Model):
     
     # Tags and categorization
     tags = models.CharField(max_length=500, blank=True)  # comma-separated
+    tag_objects = models.ManyToManyField(
+        Tag,
+        through='DesktopWallpaperTag',
+        related_name='desktop_wallpapers',
+        blank=True,
+    )
     
     # Color palette extracted from image
     color_palette = models.JSONField(
@@ -139,10 +318,14 @@ class DesktopWallpaper(models.Model):
     is_trending = models.BooleanField(default=False)
     trending_percentage = models.PositiveSmallIntegerField(
         default=0,
-        help_text="Random percentage 1-3% when trending"
+        help_text="Trending score relative to the top wallpaper"
     )
     is_featured = models.BooleanField(default=False)
     
+    # Forward-decayed popularity, maintained by ``manage.py update_trending``
+    trending_score = models.FloatField(default=0)
+    trending_engagement_seen = models.PositiveBigIntegerField(default=0, editable=False)
+    
     # For similarity calculations
     similarity_score = models.FloatField(null=True, blank=True)
     
@@ -157,13 +340,27 @@ class DesktopWallpaper(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['is_trending', '-views_count']),
+            models.Index(fields=['-trending_score']),
             models.Index(fields=['category', '-created_at']),
             models.Index(fields=['-downloads_count']),
+            # Keyset pagination of the global feed
+            models.Index(fields=['-created_at', '-id']),
+            # Random picks probe by id within a filter
+            models.Index(fields=['category', 'id']),
+            models.Index(fields=['quality_label', 'id']),
         ]
     
     def __str__(self):
         return f"{self.title} ({self.resolution_width}x{self.resolution_height})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Category as loaded, so save() can tell when the wallpaper moves
+        # (None when the field was deferred)
+        instance._loaded_category_id = instance.__dict__.get('category_id')
+        return instance
+    
     def save(self, *args, **kwargs):
         # Calculate aspect ratio if not set
         if not self.aspect_ratio and self.resolution_width and self.resolution_height:
@@ -174,13 +371,56 @@ class DesktopWallpaper(models.Model):
             self.similarity_score = self.calculate_similarity_score()
         
         is_new = self.pk is None
+        update_fields = kwargs.get('update_fields')
+        previous_category_id = getattr(self, '_loaded_category_id', None)
+        moved = (
+            not is_new
+            and previous_category_id is not None
+            and previous_category_id != self.category_id
+            and (update_fields is None or {'category', 'category_id'} & set(update_fields))
+        )
         
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if moved:
+                self.move_category_stats(previous_category_id)
+        if is_new or moved:
+            self._loaded_category_id = self.category_id
+        
+        if update_fields is None or 'tags' in update_fields:
+            sync_wallpaper_tags(self, DesktopWallpaperTag, 'desktop_wallpaper_count')
+        if update_fields is None or 'color_palette' in update_fields:
+            self.sync_palette_colors()
         
         # Update category count if this is a new wallpaper
         if is_new:
             self.category.desktop_wallpaper_count = self.category.desktop_wallpapers.count()
             self.category.save(update_fields=['desktop_wallpaper_count'])
+            # Seeded wallpapers may arrive with counts already set
+            Category.adjust_desktop_stats(
+                self.category_id,
+                downloads=self.downloads_count,
+                likes=self.likes_count,
+            )
+    
+    def move_category_stats(self, previous_category_id):
+        """Move this wallpaper's numbers from its old category's stats to the new one"""
+        # The instance may hold stale counters; read the row
+        counts = DesktopWallpaper.objects.filter(pk=self.pk).values(
+            'downloads_count', 'likes_count'
+        ).get()
+        Category.adjust_desktop_stats(
+            previous_category_id,
+            wallpapers=-1,
+            downloads=-counts['downloads_count'],
+            likes=-counts['likes_count'],
+        )
+        Category.adjust_desktop_stats(
+            self.category_id,
+            wallpapers=1,
+            downloads=counts['downloads_count'],
+            likes=counts['likes_count'],
+        )
     
     def calculate_aspect_ratio(self):
         """Calculate aspect ratio string like '16:9'"""
@@ -224,6 +464,25 @@ class DesktopWallpaper(models.Model):
         """Increment favorites count atomically"""
         self.favorites_count = models.F('favorites_count') + 1
         self.save(update_fields=['favorites_count'])
+    
+    @classmethod
+    def mutate_counter(cls, pk, field, delta):
+        """Add delta to a counter in one statement; returns (new_value, category_id, changed) or None"""
+        return mutate_counter(cls, pk, field, delta)
+    
+    def sync_palette_colors(self):
+        """Rewrite the quantized WallpaperColor rows from color_palette"""
+        from .colors import palette_buckets
+        
+        buckets = palette_buckets(self.color_palette)
+        current = dict(self.palette_colors.values_list('position', 'bucket'))
+        if current == buckets:
+            return
+        self.palette_colors.all().delete()
+        WallpaperColor.objects.bulk_create([
+            WallpaperColor(wallpaper_id=self.pk, position=position, bucket=bucket)
+            for position, bucket in buckets.items()
+        ])
 
 
 # ==================== UPDATED MOBILE WALLPAPER MODEL ====================
@@ -242,6 +501,12 @@ class MobileWallpaper(models.Model):
     
     # Tags and categorization
     tags = models.CharField(max_length=500, blank=True)  # comma-separated
+    tag_objects = models.ManyToManyField(
+        Tag,
+        through='MobileWallpaperTag',
+        related_name='mobile_wallpapers',
+        blank=True,
+    )
     
     # Color palette extracted from image
     color_palette = models.JSONField(
@@ -294,10 +559,14 @@ class MobileWallpaper(models.Model):
     is_trending = models.BooleanField(default=False)
     trending_percentage = models.PositiveSmallIntegerField(
         default=0,
-        help_text="Random percentage 1-3% when trending"
+        help_text="Trending score relative to the top wallpaper"
     )
     is_featured = models.BooleanField(default=False)
     
+    # Forward-decayed popularity, maintained by ``manage.py update_trending``
+    trending_score = models.FloatField(default=0)
+    trending_engagement_seen = models.PositiveBigIntegerField(default=0, editable=False)
+    
     # For similarity calculations
     similarity_score = models.FloatField(null=True, blank=True)
     
@@ -312,6 +581,7 @@ class MobileWallpaper(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['is_trending', '-views_count']),
+            models.Index(fields=['-trending_score']),
             models.Index(fields=['category', '-created_at']),
             models.Index(fields=['device_type', '-downloads_count']),
             models.Index(fields=['-downloads_count']),
@@ -333,6 +603,10 @@ class MobileWallpaper(models.Model):
         
         super().save(*args, **kwargs)
         
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'tags' in update_fields:
+            sync_wallpaper_tags(self, MobileWallpaperTag, 'mobile_wallpaper_count')
+        
         # Update category count if this is a new wallpaper
         if is_new:
             self.category.mobile_wallpaper_count = self.category.mobile_wallpapers.count()
@@ -379,6 +653,71 @@ class MobileWallpaper(models.Model):
         """Increment favorites count atomically"""
         self.favorites_count = models.F('favorites_count') + 1
         self.save(update_fields=['favorites_count'])
+    
+    @classmethod
+    def mutate_counter(cls, pk, field, delta):
+        """Add delta to a counter in one statement; returns (new_value, category_id, changed) or None"""
+        return mutate_counter(cls, pk, field, delta)
+
+class DesktopWallpaperTag(models.Model):
+    """Link between a desktop wallpaper and one of its tags"""
+    
+    wallpaper = models.ForeignKey(DesktopWallpaper, on_delete=models.CASCADE, related_name='tag_links')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='desktop_links')
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['wallpaper', 'tag'], name='unique_desktop_wallpaper_tag'),
+        ]
+        indexes = [
+            # Tag pages walk a tag's wallpapers newest (highest id) first
+            models.Index(fields=['tag', '-wallpaper']),
+        ]
+    
+    def __str__(self):
+        return f"{self.wallpaper_id} - {self.tag_id}"
+
+class MobileWallpaperTag(models.Model):
+    """Link between a mobile wallpaper and one of its tags"""
+    
+    wallpaper = models.ForeignKey(MobileWallpaper, on_delete=models.CASCADE, related_name='tag_links')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='mobile_links')
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['wallpaper', 'tag'], name='unique_mobile_wallpaper_tag'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', '-wallpaper']),
+        ]
+    
+    def __str__(self):
+        return f"{self.wallpaper_id} - {self.tag_id}"
+
+class WallpaperColor(models.Model):
+    """One palette color of a desktop wallpaper, quantized for indexed lookups.
+    
+    ``bucket`` comes from ``wallpapers.colors.color_bucket``; ``position`` is
+    the color's place in the palette (0 = primary).
+    """
+    
+    wallpaper = models.ForeignKey(
+        DesktopWallpaper, on_delete=models.CASCADE, related_name='palette_colors'
+    )
+    position = models.PositiveSmallIntegerField()
+    bucket = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['wallpaper', 'position'], name='unique_wallpaper_color_position'),
+        ]
+        indexes = [
+            # Color search: bucket IN (...) range lookups
+            models.Index(fields=['bucket', 'position', 'wallpaper']),
+        ]
+    
+    def __str__(self):
+        return f"{self.wallpaper_id} #{self.position} -> {self.bucket}"
 
 class DownloadAnalytics(models.Model):
     """Track download analytics for both desktop and mobile wallpapers"""
@@ -409,7 +748,9 @@ class DownloadAnalytics(models.Model):
         help_text="SHA256 hash of IP address for anonymity"
     )
     
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the download happens, not when the batch is written
+    # (auto_now_add would overwrite it in bulk_create)
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         verbose_name_plural = "Download Analytics"
@@ -422,6 +763,110 @@ class DownloadAnalytics(models.Model):
     def __str__(self):
         return f"{self.wallpaper_type} #{self.wallpaper_id} - {self.timestamp}"
     
+class DownloadDailyRollup(models.Model):
+    """Downloads per wallpaper, device type and day (``manage.py rollup_downloads``)"""
+    
+    date = models.DateField()
+    wallpaper_type = models.CharField(
+        max_length=10,
+        choices=[
+            ('desktop', 'Desktop'),
+            ('mobile', 'Mobile'),
+        ]
+    )
+    wallpaper_id = models.PositiveIntegerField()
+    device_type = models.CharField(
+        max_length=10,
+        choices=[
+            ('desktop', 'Desktop'),
+            ('mobile', 'Mobile'),
+        ],
+        help_text="User's device type"
+    )
+    
+    count = models.PositiveIntegerField(default=0)
+    unique_ip_hashes = models.PositiveIntegerField(default=0)
+    # HyperLogLog of the day's IP hashes (wallpapers.hll), mergeable across rows
+    ip_sketch = models.BinaryField(default=b'', blank=True)
+    
+    class Meta:
+        verbose_name_plural = "Download Daily Rollups"
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'wallpaper_type', 'wallpaper_id', 'device_type'],
+                name='unique_download_rollup',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['wallpaper_type', 'wallpaper_id', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.wallpaper_type} #{self.wallpaper_id} - {self.date}: {self.count}"
+    
+class JobCheckpoint(models.Model):
+    """Progress of an incremental background job"""
+    
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.PositiveBigIntegerField(default=0, help_text="Last event id processed")
+    data = models.JSONField(default=dict, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
+    
+class FeaturedScheduleQuerySet(models.QuerySet):
+    """Schedules that can resolve their wallpapers in bulk.
+    
+    ``with_wallpapers()`` exists for the admin changelist, which only takes a
+    queryset and slices it itself. It hooks QuerySet internals (``_clone``,
+    ``_fetch_all``) and does nothing for ``iterator()``; other code should
+    call ``attach_wallpapers(list(queryset))``.
+    """
+    
+    _attach_wallpapers = False
+    
+    def with_wallpapers(self):
+        """Attach each row's wallpaper on evaluation, one ``id__in`` query per type.
+        
+        Not applied by ``iterator()``.
+        """
+        clone = self._chain()
+        clone._attach_wallpapers = True
+        return clone
+    
+    def _clone(self):
+        clone = super()._clone()
+        clone._attach_wallpapers = self._attach_wallpapers
+        return clone
+    
+    def _fetch_all(self):
+        fetched = self._result_cache is None
+        super()._fetch_all()
+        if fetched and self._attach_wallpapers:
+            attach_wallpapers(self._result_cache)
+
+
+def attach_wallpapers(schedules):
+    """Resolve ``get_wallpaper()`` for many schedules with one query per wallpaper type"""
+    schedules = [s for s in schedules if isinstance(s, FeaturedSchedule)]
+    ids = defaultdict(set)
+    for schedule in schedules:
+        ids[schedule.wallpaper_type].add(schedule.wallpaper_id)
+    
+    models_by_type = {'desktop': DesktopWallpaper, 'mobile': MobileWallpaper}
+    found = {
+        wallpaper_type: models_by_type[wallpaper_type].objects.in_bulk(wallpaper_ids)
+        for wallpaper_type, wallpaper_ids in ids.items()
+        if wallpaper_type in models_by_type
+    }
+    for schedule in schedules:
+        wallpaper = found.get(schedule.wallpaper_type, {}).get(schedule.wallpaper_id)
+        schedule._wallpaper_cache = (schedule.wallpaper_type, schedule.wallpaper_id, wallpaper)
+    return schedules
+    
 class FeaturedSchedule(models.Model):
     """Schedule featured wallpapers (daily featured)"""
     
@@ -443,6 +888,8 @@ class FeaturedSchedule(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = FeaturedScheduleQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-featured_date', 'display_order']
         unique_together = ['wallpaper_type', 'wallpaper_id', 'featured_date']
@@ -454,8 +901,13 @@ class FeaturedSchedule(models.Model):
         return f"{self.wallpaper_type} #{self.wallpaper_id} - {self.featured_date}"
     
     def get_wallpaper(self):
-        """Get the actual wallpaper object"""
+        """Get the actual wallpaper object (preloaded by ``attach_wallpapers()``)"""
+        cached = getattr(self, '_wallpaper_cache', None)
+        if cached and cached[:2] == (self.wallpaper_type, self.wallpaper_id):
+            return cached[2]
         if self.wallpaper_type == 'desktop':
-            return DesktopWallpaper.objects.filter(id=self.wallpaper_id).first()
+            wallpaper = DesktopWallpaper.objects.filter(id=self.wallpaper_id).first()
         else:
-            return MobileWallpaper.objects.filter(id=self.wallpaper_id).first()
\ No newline at end of file
+            wallpaper = MobileWallpaper.objects.filter(id=self.wallpaper_id).first()
+        self._wallpaper_cache = (self.wallpaper_type, self.wallpaper_id, wallpaper)
+        return wallpaper
\ No newline at end of file
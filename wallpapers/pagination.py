@@ -0,0 +1,75 @@
+# wallpapers/pagination.py
+"""Keyset (cursor) pagination for infinite scroll endpoints.
+
+Instead of OFFSET + COUNT, each page remembers the sort value and id of its
+last row in an opaque cursor. The next page starts right after that row with
+an indexed range filter, so page 500 costs the same as page 1.
+"""
+
+import base64
+
+from django.db.models import Q
+
+
+def encode_cursor(value, pk):
+    """Pack a (sort value, id) pair into an opaque URL-safe token"""
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    raw = f'{value},{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Unpack a cursor token into raw (value, id) strings.
+
+    Raises ValueError for anything that isn't a cursor we issued.
+    """
+    padded = token + '=' * (-len(token) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+    value, sep, pk = raw.rpartition(',')
+    if not sep or not pk.isdigit():
+        raise ValueError('Invalid cursor')
+    return value, int(pk)
+
+
+class KeysetPaginator:
+    """Paginate a queryset by descending ``field`` with ``id`` as tie-breaker"""
+
+    def __init__(self, queryset, per_page, field='created_at'):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+
+    def _after(self, queryset, cursor):
+        raw_value, pk = decode_cursor(cursor)
+        model_field = queryset.model._meta.get_field(self.field)
+        try:
+            value = model_field.to_python(raw_value)
+        except Exception:
+            raise ValueError('Invalid cursor')
+        return queryset.filter(
+            Q(**{f'{self.field}__lt': value}) |
+            Q(**{self.field: value, 'id__lt': pk})
+        )
+
+    def page(self, cursor=None):
+        """Return (items, next_cursor); next_cursor is None on the last page"""
+        queryset = self.queryset.order_by(f'-{self.field}', '-id')
+        if cursor:
+            queryset = self._after(queryset, cursor)
+
+        # Fetch one extra row to know whether another page exists
+        items = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(items) > self.per_page:
+            items = items[:self.per_page]
+            last = items[-1]
+            if isinstance(last, dict):
+                # .values() rows
+                next_cursor = encode_cursor(last[self.field], last['id'])
+            else:
+                next_cursor = encode_cursor(getattr(last, self.field), last.pk)
+        return items, next_cursor
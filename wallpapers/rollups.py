@@ -0,0 +1,179 @@
+# wallpapers/rollups.py
+"""Daily download rollups and raw-event retention.
+
+``DownloadAnalytics`` keeps one wide row per download (user agent
+included); reports read ``DownloadDailyRollup`` instead, one row per
+wallpaper, device type and day. Each rollup row also carries a
+HyperLogLog sketch of that day's IP hashes (``wallpapers.hll``), so
+"unique downloaders in the last N days" for a wallpaper or a whole
+category is a merge of small sketches rather than a ``COUNT(DISTINCT)``
+over raw events.
+
+``rollup_downloads`` is incremental and idempotent: it finds the days
+touched by raw rows after its checkpoint and recomputes each of those days
+in full from the raw table, replacing that day's rollup rows in one
+transaction, so re-running it yields the same rollups.
+
+Raw rows older than DOWNLOAD_ANALYTICS_RETENTION_DAYS (0 keeps them
+forever) are deleted afterwards, but only whole days the rollup has
+already covered.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .hll import HyperLogLog, merge
+from .models import DesktopWallpaper, DownloadAnalytics, DownloadDailyRollup, JobCheckpoint
+
+DOWNLOAD_ANALYTICS_RETENTION_DAYS = getattr(settings, 'DOWNLOAD_ANALYTICS_RETENTION_DAYS', 90)
+
+CHECKPOINT_NAME = 'download_rollup'
+
+DELETE_BATCH_SIZE = 5000
+
+
+def day_bounds(day):
+    """Aware [start, end) datetimes of a calendar day"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def touched_days(after_id, upto_id):
+    """Days with raw events in (after_id, upto_id]"""
+    return sorted(
+        DownloadAnalytics.objects
+        .filter(id__gt=after_id, id__lte=upto_id)
+        .annotate(day=TruncDate('timestamp'))
+        .order_by()
+        .values_list('day', flat=True)
+        .distinct()
+    )
+
+
+def rollup_day(day):
+    """Recompute one day's rollup rows from the raw events; returns the row count"""
+    start, end = day_bounds(day)
+    rows = (
+        DownloadAnalytics.objects
+        .filter(timestamp__gte=start, timestamp__lt=end)
+        .order_by()
+        .values_list('wallpaper_type', 'wallpaper_id', 'device_type', 'ip_hash')
+    )
+    # One pass: counts, exact distinct IP hashes and the day's sketch per group
+    groups = {}
+    for wallpaper_type, wallpaper_id, device_type, ip_hash in rows.iterator(chunk_size=2000):
+        group = groups.get((wallpaper_type, wallpaper_id, device_type))
+        if group is None:
+            group = groups[(wallpaper_type, wallpaper_id, device_type)] = [0, set(), HyperLogLog()]
+        group[0] += 1
+        if ip_hash and ip_hash not in group[1]:
+            group[1].add(ip_hash)
+            group[2].add(ip_hash)
+
+    rollups = [
+        DownloadDailyRollup(
+            date=day,
+            wallpaper_type=wallpaper_type,
+            wallpaper_id=wallpaper_id,
+            device_type=device_type,
+            count=count,
+            unique_ip_hashes=len(ip_hashes),
+            ip_sketch=sketch.to_bytes(),
+        )
+        for (wallpaper_type, wallpaper_id, device_type), (count, ip_hashes, sketch) in groups.items()
+    ]
+    with transaction.atomic():
+        DownloadDailyRollup.objects.filter(date=day).delete()
+        DownloadDailyRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+def retention_cutoff(today=None):
+    """First day whose raw rows are kept, or None when retention is off"""
+    if not DOWNLOAD_ANALYTICS_RETENTION_DAYS:
+        return None
+    today = today or timezone.localdate()
+    return today - timedelta(days=DOWNLOAD_ANALYTICS_RETENTION_DAYS)
+
+
+def prune_raw(cutoff, upto_id):
+    """Delete rolled-up raw rows from days before ``cutoff``, in batches"""
+    start, _ = day_bounds(cutoff)
+    deleted = 0
+    while True:
+        ids = list(
+            DownloadAnalytics.objects
+            .filter(timestamp__lt=start, id__lte=upto_id)
+            .order_by()
+            .values_list('id', flat=True)[:DELETE_BATCH_SIZE]
+        )
+        if not ids:
+            return deleted
+        deleted += DownloadAnalytics.objects.filter(id__in=ids).delete()[0]
+
+
+def rollup_downloads(today=None):
+    """Roll up days touched since the last run, then apply retention.
+
+    Returns ``(days rolled up, rollup rows written, raw rows deleted)``.
+    """
+    checkpoint, _ = JobCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+    upto_id = DownloadAnalytics.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    days = touched_days(checkpoint.last_id, upto_id)
+    written = sum(rollup_day(day) for day in days)
+
+    if upto_id > checkpoint.last_id:
+        checkpoint.last_id = upto_id
+        checkpoint.save(update_fields=['last_id', 'updated_at'])
+
+    cutoff = retention_cutoff(today)
+    deleted = prune_raw(cutoff, checkpoint.last_id) if cutoff else 0
+    return len(days), written, deleted
+
+
+def recent_downloads(wallpaper_type, wallpaper_id, days=30):
+    """Downloads over the last ``days`` days, from the rollups"""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    return DownloadDailyRollup.objects.filter(
+        wallpaper_type=wallpaper_type, wallpaper_id=wallpaper_id, date__gte=since
+    ).aggregate(total=Sum('count'))['total'] or 0
+
+
+def _rollups_since(days):
+    since = timezone.localdate() - timedelta(days=days - 1)
+    return DownloadDailyRollup.objects.filter(date__gte=since).exclude(ip_sketch=b'')
+
+
+def unique_downloaders(wallpaper_type, wallpaper_id, days=30):
+    """Estimated distinct downloaders of one wallpaper over the last ``days`` days"""
+    sketches = _rollups_since(days).filter(
+        wallpaper_type=wallpaper_type, wallpaper_id=wallpaper_id
+    ).values_list('ip_sketch', flat=True)
+    return merge(sketches).count()
+
+
+def category_unique_downloaders(category_id, days=30):
+    """Estimated distinct downloaders of a category's desktop wallpapers.
+
+    Merges every wallpaper-day sketch in the category, so the estimate is
+    cached until the next rollup run.
+    """
+    checkpoint = JobCheckpoint.objects.filter(name=CHECKPOINT_NAME).values_list('last_id', flat=True).first()
+    key = f'uniques:category:{category_id}:{days}:{timezone.localdate()}:{checkpoint}'
+
+    def build():
+        sketches = _rollups_since(days).filter(
+            wallpaper_type='desktop',
+            wallpaper_id__in=DesktopWallpaper.objects.filter(category_id=category_id).values('id'),
+        ).values_list('ip_sketch', flat=True)
+        return merge(sketches.iterator(chunk_size=2000)).count()
+
+    # Keys change with the day and every rollup run; old ones just expire
+    return cache.get_or_set(key, build, timeout=24 * 60 * 60)
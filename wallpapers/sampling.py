@@ -0,0 +1,45 @@
+# wallpapers/sampling.py
+"""Constant-time random wallpaper selection.
+
+Rather than loading every id, pick a random point inside the cached
+[min_id, max_id] range of the (optionally filtered) catalog and probe the
+primary key index for the first wallpaper at or after it, wrapping around
+if the point falls past the last one. Ids that follow large gaps are
+slightly more likely to be picked, which is fine for a "surprise me" link.
+"""
+
+import random
+
+from django.db.models import Max, Min
+
+from .cache import get_or_build
+from .models import DesktopWallpaper
+
+
+def _id_bounds(queryset, cache_name):
+    """(min_id, max_id) for the queryset, cached per catalog version"""
+    def build():
+        bounds = queryset.aggregate(low=Min('id'), high=Max('id'))
+        return (bounds['low'], bounds['high'])
+    return get_or_build(cache_name, build)
+
+
+def random_wallpaper_id(category_id=None, quality=None):
+    """Return a random desktop wallpaper id, or None if nothing matches"""
+    wallpapers = DesktopWallpaper.objects.all()
+    if category_id is not None:
+        wallpapers = wallpapers.filter(category_id=category_id)
+    if quality:
+        wallpapers = wallpapers.filter(quality_label=quality)
+    
+    low, high = _id_bounds(wallpapers, f'random:bounds:{category_id}:{quality}')
+    if low is None:
+        return None
+    
+    probe = random.randint(low, high)
+    ids = wallpapers.order_by().values_list('id', flat=True)
+    picked = ids.filter(id__gte=probe).order_by('id').first()
+    if picked is None:
+        # Rows near the top were deleted since the bounds were cached
+        picked = ids.filter(id__lt=probe).order_by('-id').first()
+    return picked
@@ -0,0 +1,160 @@
+# wallpapers/search.py
+"""Full-text search over desktop wallpaper titles and tags.
+
+SQLite (development) uses an FTS5 external-content table kept in sync by
+triggers; PostgreSQL (production) uses a GIN index over a weighted
+tsvector expression, which the database keeps current on its own. Both are
+created by migration 0007. Any other backend falls back to ``icontains``.
+
+Results are ranked by text relevance with a bounded popularity boost, so a
+heavily downloaded wallpaper can at most double its relevance score. An
+optional color narrows them to wallpapers with a nearby palette bucket
+(see colors.py).
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .colors import color_bucket, nearby_buckets
+from .models import DesktopWallpaper, WallpaperColor
+
+FTS_TABLE = 'wallpapers_desktopwallpaper_fts'
+
+# Must match the indexed expression exactly for PostgreSQL to use the index
+PG_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', replace(coalesce(tags, ''), ',', ' ')), 'B')"
+)
+
+# 1.0 for new wallpapers, approaching 2.0 for very popular ones
+POPULARITY_BOOST = '(1.0 + w.downloads_count / (w.downloads_count + 1000.0))'
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _terms(query):
+    """Split user input into plain word tokens (no search operators)"""
+    return WORD_RE.findall(query.lower())[:10]
+
+
+def _fts_query(terms):
+    # Every term must match, each as a word prefix for partial input
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _pg_query(terms):
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+class SearchResults:
+    """Lazily ranked search results that Paginator can slice and count"""
+
+    def __init__(self, query, color=None):
+        self.query = query
+        self.terms = _terms(query)
+        self.vendor = connection.vendor
+        bucket = color_bucket(color) if color else None
+        self.buckets = list(nearby_buckets(bucket)) if bucket is not None else []
+        self._count = None
+
+    def _color_sql(self):
+        """Extra WHERE clause and params restricting ``w`` to the color buckets"""
+        if not self.buckets:
+            return '', []
+        placeholders = ', '.join(['%s'] * len(self.buckets))
+        return (
+            f' AND w.id IN (SELECT wallpaper_id FROM {WallpaperColor._meta.db_table} '
+            f'WHERE bucket IN ({placeholders}))',
+            list(self.buckets),
+        )
+
+    def _fallback(self):
+        filters = Q()
+        for term in self.terms:
+            filters &= Q(title__icontains=term) | Q(tags__icontains=term)
+        if self.buckets:
+            filters &= Q(id__in=WallpaperColor.objects.filter(
+                bucket__in=self.buckets
+            ).values('wallpaper_id'))
+        return DesktopWallpaper.objects.filter(filters).order_by('-downloads_count', '-created_at')
+
+    def count(self):
+        """Total number of matches, computed once"""
+        if self._count is None:
+            if not self.terms:
+                self._count = 0
+            elif self.vendor == 'sqlite':
+                color_sql, color_params = self._color_sql()
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'SELECT COUNT(*) FROM {FTS_TABLE} '
+                        f'JOIN wallpapers_desktopwallpaper w ON w.id = {FTS_TABLE}.rowid '
+                        f'WHERE {FTS_TABLE} MATCH %s{color_sql}',
+                        [_fts_query(self.terms), *color_params],
+                    )
+                    self._count = cursor.fetchone()[0]
+            elif self.vendor == 'postgresql':
+                color_sql, color_params = self._color_sql()
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'SELECT COUNT(*) FROM wallpapers_desktopwallpaper w '
+                        f"WHERE {PG_DOCUMENT} @@ to_tsquery('simple', %s){color_sql}",
+                        [_pg_query(self.terms), *color_params],
+                    )
+                    self._count = cursor.fetchone()[0]
+            else:
+                self._count = self._fallback().count()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def _ranked_ids(self, offset, limit):
+        color_sql, color_params = self._color_sql()
+        if self.vendor == 'sqlite':
+            sql = (
+                f'SELECT w.id FROM {FTS_TABLE} '
+                f'JOIN wallpapers_desktopwallpaper w ON w.id = {FTS_TABLE}.rowid '
+                f'WHERE {FTS_TABLE} MATCH %s{color_sql} '
+                # bm25() is negative: smaller means more relevant
+                f'ORDER BY bm25({FTS_TABLE}, 2.0, 1.0) * {POPULARITY_BOOST}, w.id DESC '
+                f'LIMIT %s OFFSET %s'
+            )
+            params = [_fts_query(self.terms), *color_params, limit, offset]
+        else:
+            sql = (
+                f'SELECT w.id FROM wallpapers_desktopwallpaper w '
+                f"WHERE {PG_DOCUMENT} @@ to_tsquery('simple', %s){color_sql} "
+                f"ORDER BY ts_rank({PG_DOCUMENT}, to_tsquery('simple', %s)) * {POPULARITY_BOOST} DESC, w.id DESC "
+                f'LIMIT %s OFFSET %s'
+            )
+            query = _pg_query(self.terms)
+            params = [query, *color_params, query, limit, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        if not self.terms:
+            return []
+        start = key.start or 0
+        stop = key.stop if key.stop is not None else self.count()
+        if stop <= start:
+            return []
+
+        if self.vendor not in ('sqlite', 'postgresql'):
+            return list(self._fallback()[start:stop])
+
+        ids = self._ranked_ids(start, stop - start)
+        wallpapers = DesktopWallpaper.objects.in_bulk(ids)
+        return [wallpapers[wid] for wid in ids if wid in wallpapers]
+
+
+def search_wallpapers(query, color=None):
+    """Ranked desktop wallpaper results for a user query, optionally near a color"""
+    return SearchResults(query, color)
+
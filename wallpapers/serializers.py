@@ -0,0 +1,112 @@
+# wallpapers/serializers.py
+"""Compact JSON for wallpaper API responses.
+
+Rows are read with ``.values()`` over a declared field set, so no model
+instances are built and large columns like ``color_palette`` are never
+fetched. Clients can narrow the set further with ``?fields=id,title``.
+Responses are written without whitespace between tokens.
+"""
+
+from django.http import JsonResponse
+
+# Columns any endpoint may expose; ``?fields=`` can only pick from these
+WALLPAPER_FIELDS = (
+    'id', 'title', 'thumbnail_url', 'image_url',
+    'resolution_width', 'resolution_height', 'aspect_ratio', 'quality_label',
+    'likes_count', 'favorites_count', 'downloads_count', 'views_count',
+    'is_trending', 'trending_percentage', 'category_id', 'created_at',
+)
+
+COMPACT_JSON = {'separators': (',', ':')}
+
+
+def compact_json_response(data, **kwargs):
+    """JsonResponse without the default ', ' / ': ' padding"""
+    return JsonResponse(data, json_dumps_params=COMPACT_JSON, **kwargs)
+
+
+class WallpaperSerializer:
+    """Declared field set for one endpoint's wallpaper rows.
+
+    ``defaults`` replace empty values (``None``/``''``/``0``) per field and
+    ``constants`` are added to every row.
+    """
+
+    def __init__(self, fields, defaults=None, constants=None):
+        unknown = set(fields) - set(WALLPAPER_FIELDS)
+        if unknown:
+            raise ValueError(f'Unknown wallpaper fields: {", ".join(sorted(unknown))}')
+        self.fields = tuple(fields)
+        self.defaults = defaults or {}
+        self.constants = constants or {}
+
+    def for_request(self, request):
+        """Copy narrowed to ``?fields=``; unknown names are ignored"""
+        requested = request.GET.get('fields')
+        if not requested:
+            return self
+        names = {name.strip() for name in requested.split(',')}
+        fields = [field for field in self.fields if field in names]
+        constants = {key: value for key, value in self.constants.items() if key in names}
+        if not fields and not constants:
+            return self
+        return WallpaperSerializer(fields, self.defaults, constants)
+
+    def queryset(self, queryset, *extra):
+        """``.values()`` of the field set plus ``extra`` columns (e.g. for cursors)"""
+        columns = list(self.fields)
+        columns += [column for column in extra if column not in columns]
+        return queryset.values(*columns)
+
+    def row(self, values):
+        data = {}
+        for field in self.fields:
+            value = values[field]
+            if not value and field in self.defaults:
+                value = self.defaults[field]
+            elif field == 'created_at' and value is not None:
+                value = value.isoformat()
+            data[field] = value
+        data.update(self.constants)
+        return data
+
+    def rows(self, values_list):
+        return [self.row(values) for values in values_list]
+
+
+# api_wallpaper_list / infinite scroll cards
+LIST_SERIALIZER = WallpaperSerializer((
+    'id', 'title', 'thumbnail_url', 'image_url', 'resolution_width', 'resolution_height',
+    'quality_label', 'likes_count', 'favorites_count', 'downloads_count', 'is_trending',
+    'created_at',
+))
+
+# Category page load-more cards
+CATEGORY_SERIALIZER = WallpaperSerializer((
+    'id', 'title', 'thumbnail_url', 'downloads_count', 'is_trending',
+    'resolution_width', 'resolution_height',
+))
+
+# Favorites page; placeholders keep cards renderable for sparse rows
+FAVORITES_SERIALIZER = WallpaperSerializer(
+    (
+        'id', 'title', 'thumbnail_url', 'image_url', 'resolution_width', 'resolution_height',
+        'quality_label', 'likes_count', 'favorites_count', 'downloads_count', 'views_count',
+        'created_at', 'is_trending',
+    ),
+    defaults={
+        'title': 'Untitled Wallpaper',
+        'thumbnail_url': 'https://via.placeholder.com/300x200',
+        'image_url': 'https://via.placeholder.com/1920x1080',
+        'resolution_width': 1920,
+        'resolution_height': 1080,
+        'quality_label': 'HD',
+        'likes_count': 0,
+        'favorites_count': 0,
+        'downloads_count': 0,
+        'views_count': 0,
+        'created_at': '2024-01-01T00:00:00Z',
+        'is_trending': False,
+    },
+    constants={'type': 'desktop'},
+)
@@ -0,0 +1,62 @@
+# wallpapers/signals.py
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from .cache import bump_catalog_version, invalidate_nav_categories
+from .counters import COUNTER_FIELDS
+from .models import Category, DesktopWallpaper, FeaturedSchedule, MobileWallpaper, Tag
+
+
+def _is_counter_update(update_fields):
+    # Saves that only touch counters don't change what pages show
+    # structurally, so they must not flush the page caches on every view.
+    return bool(update_fields) and set(update_fields) <= set(COUNTER_FIELDS)
+
+
+@receiver(post_save, sender=DesktopWallpaper)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=FeaturedSchedule)
+def catalog_saved(sender, instance, update_fields=None, **kwargs):
+    """Bump the catalog version when a wallpaper, category or schedule changes"""
+    if _is_counter_update(update_fields):
+        return
+    if sender is Category:
+        invalidate_nav_categories()
+    bump_catalog_version()
+
+
+@receiver(post_delete, sender=DesktopWallpaper)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=FeaturedSchedule)
+def catalog_deleted(sender, instance, **kwargs):
+    """Bump the catalog version when a wallpaper, category or schedule is removed"""
+    if sender is Category:
+        invalidate_nav_categories()
+    bump_catalog_version()
+
+
+@receiver(pre_delete, sender=DesktopWallpaper)
+def wallpaper_deleted_stats(sender, instance, **kwargs):
+    """Take a removed wallpaper's numbers out of its category stats"""
+    # The instance being deleted may hold stale counters; read the row
+    counts = DesktopWallpaper.objects.filter(pk=instance.pk).values(
+        'downloads_count', 'likes_count'
+    ).first()
+    if counts is None:
+        return
+    Category.adjust_desktop_stats(
+        instance.category_id,
+        wallpapers=-1,
+        downloads=-counts['downloads_count'],
+        likes=-counts['likes_count'],
+    )
+
+
+@receiver(pre_delete, sender=DesktopWallpaper)
+@receiver(pre_delete, sender=MobileWallpaper)
+def wallpaper_deleted_tags(sender, instance, **kwargs):
+    """Take a removed wallpaper out of its tags' facet counts"""
+    # The links themselves go with the wallpaper (CASCADE)
+    field = 'desktop_wallpaper_count' if sender is DesktopWallpaper else 'mobile_wallpaper_count'
+    tag_ids = list(instance.tag_links.values_list('tag_id', flat=True))
+    Tag.adjust_counts(tag_ids, field, -1)
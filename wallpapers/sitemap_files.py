@@ -0,0 +1,184 @@
+# wallpapers/sitemap_files.py
+"""Pre-generated, gzipped wallpaper sitemap sections.
+
+Wallpapers are split into sections by fixed id ranges of
+SITEMAP_SECTION_SIZE (section 0 holds ids 1-5000, section 1 ids
+5001-10000, ...), so a section's contents only change when a wallpaper in
+its range is added, edited or removed. ``manage.py generate_sitemaps``
+writes each section to SITEMAP_DIR as ``wallpapers-<n>.xml.gz`` and
+records a signature (row count + latest ``updated_at``) per section in
+``manifest.json``; the next run rewrites only sections whose signature
+changed.
+
+Section XML is streamed from ``values_list('id', 'updated_at')`` over an
+id range, never from full model instances, and the request path never
+scans the whole table: it serves the files, or streams a single id range
+when a file hasn't been generated yet.
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import zlib
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Count, F, Max
+from django.urls import reverse
+
+from .models import DesktopWallpaper
+
+SITEMAP_SECTION_SIZE = getattr(settings, 'SITEMAP_SECTION_SIZE', 5000)
+SITEMAP_DIR = getattr(settings, 'SITEMAP_DIR', os.path.join(settings.MEDIA_ROOT, 'sitemaps'))
+SITEMAP_PROTOCOL = getattr(settings, 'SITEMAP_PROTOCOL', 'https')
+
+MANIFEST_NAME = 'manifest.json'
+
+URLSET_OPEN = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+URLSET_CLOSE = '</urlset>\n'
+
+
+def section_filename(section):
+    return f'wallpapers-{section}.xml.gz'
+
+
+def section_path(section):
+    return os.path.join(str(SITEMAP_DIR), section_filename(section))
+
+
+def section_bounds(section):
+    """Inclusive id range covered by a section"""
+    first = section * SITEMAP_SECTION_SIZE + 1
+    return first, first + SITEMAP_SECTION_SIZE - 1
+
+
+def section_signatures():
+    """``{section: {'count': n, 'lastmod': iso}}`` for every non-empty section.
+
+    One grouped aggregate; used by the generator, not on the request path.
+    """
+    rows = (
+        DesktopWallpaper.objects
+        .annotate(section=(F('id') - 1) / SITEMAP_SECTION_SIZE)
+        .order_by()
+        .values('section')
+        .annotate(count=Count('id'), lastmod=Max('updated_at'))
+    )
+    return {
+        row['section']: {'count': row['count'], 'lastmod': row['lastmod'].isoformat()}
+        for row in rows
+    }
+
+
+def iter_section_xml(section, base_url):
+    """Yield the urlset XML for one section in chunks"""
+    first, last = section_bounds(section)
+    rows = (
+        DesktopWallpaper.objects
+        .filter(id__gte=first, id__lte=last)
+        .order_by('id')
+        .values_list('id', 'updated_at')
+    )
+    yield URLSET_OPEN
+    chunk = []
+    for wallpaper_id, updated_at in rows.iterator(chunk_size=1000):
+        location = escape(base_url + reverse('wallpapers:wallpaper_detail', args=[wallpaper_id]))
+        chunk.append(
+            f'<url><loc>{location}</loc><lastmod>{updated_at.date().isoformat()}</lastmod>'
+            f'<changefreq>monthly</changefreq><priority>0.7</priority></url>\n'
+        )
+        if len(chunk) >= 500:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+    yield URLSET_CLOSE
+
+
+def iter_gzip(chunks):
+    """Gzip-compress a stream of text chunks on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def write_section(section, base_url):
+    """Write one section file atomically"""
+    directory = str(SITEMAP_DIR)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix='.tmp-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+            for chunk in iter_section_xml(section, base_url):
+                f.write(chunk.encode())
+        os.replace(temp_path, section_path(section))
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_manifest():
+    try:
+        with open(os.path.join(str(SITEMAP_DIR), MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(manifest):
+    directory = str(SITEMAP_DIR)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix='.tmp-', dir=directory)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(temp_path, os.path.join(directory, MANIFEST_NAME))
+
+
+def generate(base_url, force=False):
+    """Bring the section files up to date; returns (written, removed, total)"""
+    previous = read_manifest() or {}
+    old_sections = previous.get('sections', {}) if previous.get('base_url') == base_url else {}
+    signatures = section_signatures()
+
+    written = 0
+    for section, signature in sorted(signatures.items()):
+        if (
+            not force
+            and old_sections.get(str(section)) == signature
+            and os.path.exists(section_path(section))
+        ):
+            continue
+        write_section(section, base_url)
+        written += 1
+
+    removed = 0
+    for section in set(old_sections) - {str(section) for section in signatures}:
+        try:
+            os.unlink(section_path(int(section)))
+            removed += 1
+        except OSError:
+            pass
+
+    write_manifest({
+        'base_url': base_url,
+        'sections': {str(section): signature for section, signature in signatures.items()},
+    })
+    return written, removed, len(signatures)
+
+
+def section_count_estimate():
+    """Sections implied by the highest id (a single index lookup)"""
+    max_id = DesktopWallpaper.objects.aggregate(max_id=Max('id'))['max_id']
+    if not max_id:
+        return 0
+    return (max_id - 1) // SITEMAP_SECTION_SIZE + 1
@@ -1,6 +1,6 @@
 from django.contrib.sitemaps import Sitemap
 from django.urls import reverse
-from .models import DesktopWallpaper, Category
+from .models import Category
 from django.utils import timezone
 
 class StaticViewSitemap(Sitemap):
@@ -44,32 +44,3 @@ class CategorySitemap(Sitemap):
 
     def location(self, obj):
         return reverse('wallpapers:category_detail', args=[obj.slug])
-
-class WallpaperSitemap(Sitemap):
-    """Sitemap for individual wallpapers"""
-    changefreq = "monthly"
-    priority = 0.7
-
-    def items(self):
-        # Get all wallpapers (you might want to filter if you have many)
-        return DesktopWallpaper.objects.all().order_by('-created_at')
-
-    def lastmod(self, obj):
-        # Use updated_at if available, otherwise created_at
-        return obj.updated_at.date() if obj.updated_at else obj.created_at.date()
-
-    def location(self, obj):
-        return reverse('wallpapers:wallpaper_detail', args=[obj.id])
-
-# If you have thousands of wallpapers, consider paginating:
-class PaginatedWallpaperSitemap(Sitemap):
-    """Paginated sitemap for large number of wallpapers"""
-    changefreq = "monthly"
-    priority = 0.6
-    limit = 5000  # Google's limit per sitemap file
-
-    def items(self):
-        return DesktopWallpaper.objects.all().order_by('id')
-
-    def location(self, obj):
-        return reverse('wallpapers:wallpaper_detail', args=[obj.id])
\ No newline at end of file
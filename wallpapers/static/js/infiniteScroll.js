@@ -1,8 +1,10 @@
 class InfiniteScroll {
-    constructor(containerSelector, loadMoreUrl) {
+    constructor(containerSelector, loadMoreUrl, initialCursor = null) {
         this.container = document.querySelector(containerSelector);
         this.loadMoreUrl = loadMoreUrl;
         this.page = 2;
+        // Opaque keyset cursor from the server; preferred over page numbers
+        this.cursor = initialCursor;
         this.loading = false;
         this.hasMore = true;
         
@@ -33,7 +35,7 @@ class InfiniteScroll {
         this.showLoadingSkeleton();
 
         try {
-            const response = await fetch(`${this.loadMoreUrl}?page=${this.page}`);
+            const response = await fetch(this.buildUrl());
             const data = await response.json();
 
             if (data.wallpapers.length === 0) {
@@ -46,6 +48,14 @@ class InfiniteScroll {
             this.appendWallpapers(data.wallpapers);
             this.page++;
 
+            if (data.next_cursor) {
+                this.cursor = data.next_cursor;
+            }
+            if (data.has_next === false) {
+                this.hasMore = false;
+                this.showNoMoreContent();
+            }
+
         } catch (error) {
             console.error('Error loading more wallpapers:', error);
         } finally {
@@ -54,6 +64,16 @@ class InfiniteScroll {
         }
     }
 
+    buildUrl() {
+        const url = new URL(this.loadMoreUrl, window.location.origin);
+        if (this.cursor) {
+            url.searchParams.set('cursor', this.cursor);
+        } else {
+            url.searchParams.set('page', this.page);
+        }
+        return url.toString();
+    }
+
     showLoadingSkeleton() {
         const skeleton = document.createElement('div');
         skeleton.className = 'loading-skeleton';
@@ -70,6 +90,14 @@ class InfiniteScroll {
         if (skeleton) skeleton.remove();
     }
 
+    showNoMoreContent() {
+        if (document.querySelector('.no-more-content')) return;
+        const message = document.createElement('p');
+        message.className = 'no-more-content';
+        message.textContent = "You've reached the end";
+        this.container.parentNode.insertBefore(message, this.container.nextSibling);
+    }
+
     appendWallpapers(wallpapers) {
         const grid = this.container;
         wallpapers.forEach(wallpaper => {
@@ -449,6 +449,72 @@ window.FavoritesManager = FavoritesManager;
 window.NotificationManager = NotificationManager;
 
 // Initialize on page load
+// Liked/favorited state from the server session, for a whole grid at once
+class WallpaperStatus {
+    // Flags embedded by the {% wallpaper_status_json %} template tag
+    static embedded(elementId = 'wallpaper-status') {
+        const element = document.getElementById(elementId);
+        if (!element) return {};
+        try {
+            return JSON.parse(element.textContent);
+        } catch (error) {
+            return {};
+        }
+    }
+
+    // One request for any number of cards
+    static async fetch(ids) {
+        if (!ids.length) return {};
+        const response = await fetch('/api/status/', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({ids: ids}),
+        });
+        if (!response.ok) return {};
+        const data = await response.json();
+        return data.status || {};
+    }
+
+    static apply(status, root = document) {
+        root.querySelectorAll('.wallpaper-card[data-wallpaper-id]').forEach(card => {
+            const flags = status[card.dataset.wallpaperId];
+            if (!flags) return;
+            const likeBtn = card.querySelector('.like-btn');
+            if (likeBtn && flags.liked) {
+                likeBtn.dataset.liked = 'true';
+                likeBtn.classList.add('active');
+                const icon = likeBtn.querySelector('i');
+                if (icon) icon.className = 'fas fa-heart';
+            }
+            const favoriteBtn = card.querySelector('.favorite-btn');
+            if (favoriteBtn && flags.favorited) {
+                favoriteBtn.dataset.favorited = 'true';
+                favoriteBtn.classList.add('active');
+                const icon = favoriteBtn.querySelector('i');
+                if (icon) icon.className = 'fas fa-star';
+            }
+        });
+    }
+
+    // Apply embedded flags and fetch the rest of the cards on the page
+    static async init(root = document) {
+        const status = WallpaperStatus.embedded();
+        WallpaperStatus.apply(status, root);
+        const missing = [...root.querySelectorAll('.wallpaper-card[data-wallpaper-id]')]
+            .map(card => card.dataset.wallpaperId)
+            .filter(id => !(id in status));
+        if (missing.length && root.querySelector('.like-btn, .favorite-btn')) {
+            try {
+                WallpaperStatus.apply(await WallpaperStatus.fetch(missing), root);
+            } catch (error) {
+                console.error('Error loading wallpaper status:', error);
+            }
+        }
+    }
+}
+
+window.WallpaperStatus = WallpaperStatus;
+
 document.addEventListener('DOMContentLoaded', function() {
     console.log('WallDrafts initialized');
     
@@ -479,6 +545,9 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
     
+    // Session likes/favorites for the whole grid in one request
+    WallpaperStatus.init();
+    
     // Add hover effect to wallpaper cards
     const wallpaperCards = document.querySelectorAll('.wallpaper-card');
     wallpaperCards.forEach(card => {
@@ -0,0 +1,47 @@
+# wallpapers/status.py
+"""Liked/favorited flags for many wallpapers from one session read.
+
+Likes and favorites are remembered in the session as ``liked_<id>`` and
+``favorited_<id>`` keys (see ``toggle_like``/``toggle_favorite``). Grids
+ask for all their cards at once instead of two requests per card.
+"""
+
+# Upper bound on ids per status lookup
+MAX_STATUS_IDS = 200
+
+
+def parse_ids(raw):
+    """Turn ``'1,2,3'`` or a list of ids into unique ints, invalid ones dropped.
+    
+    Raises ValueError if ``raw`` is neither a string nor a list.
+    """
+    if raw is None:
+        raw = []
+    elif isinstance(raw, str):
+        raw = raw.split(',')
+    elif not isinstance(raw, list):
+        raise ValueError('ids must be a list or a comma-separated string')
+    ids = []
+    seen = set()
+    for value in raw:
+        try:
+            wallpaper_id = int(str(value).strip())
+        except ValueError:
+            continue
+        if wallpaper_id > 0 and wallpaper_id not in seen:
+            seen.add(wallpaper_id)
+            ids.append(wallpaper_id)
+    return ids[:MAX_STATUS_IDS]
+
+
+def wallpaper_status(session, ids):
+    """Return ``{id: {'liked': bool, 'favorited': bool}}`` for ``ids``"""
+    # One load of the session data, then plain dict lookups
+    data = dict(session.items())
+    return {
+        wallpaper_id: {
+            'liked': bool(data.get(f'liked_{wallpaper_id}', False)),
+            'favorited': bool(data.get(f'favorited_{wallpaper_id}', False)),
+        }
+        for wallpaper_id in ids
+    }
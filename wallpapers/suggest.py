@@ -0,0 +1,158 @@
+# wallpapers/suggest.py
+"""In-process prefix index for search autocomplete.
+
+Terms (wallpaper titles, individual tags and category names) live in a
+sorted list; a prefix lookup is two bisects plus a top-N pick by weight, so
+keystrokes never reach the database. Weights are summed downloads.
+
+The index is built on first use. When the catalog version changes it only
+loads wallpapers newer than the last one it has seen, and it is rebuilt in
+full every SUGGEST_REBUILD_SECONDS so weights follow download counts.
+"""
+
+import heapq
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+from .cache import get_catalog_version
+from .models import Category, DesktopWallpaper
+
+SUGGEST_REBUILD_SECONDS = getattr(settings, 'SUGGEST_REBUILD_SECONDS', 3600)
+
+MAX_TERM_LENGTH = 100
+
+
+class TermBatch:
+    """Terms and weights collected away from the index lock"""
+
+    def __init__(self):
+        self.weights = {}       # term -> weight
+        self.display = {}       # term -> original spelling
+        self.max_id = 0
+
+    def add_term(self, text, weight):
+        text = ' '.join(text.split())[:MAX_TERM_LENGTH]
+        key = text.lower()
+        if not key:
+            return
+        if key in self.weights:
+            self.weights[key] += weight
+        else:
+            self.weights[key] = weight
+            self.display[key] = text
+
+    def add_wallpapers(self, wallpapers):
+        for wallpaper_id, title, tags, downloads in wallpapers:
+            weight = downloads + 1
+            self.add_term(title, weight)
+            for tag in tags.split(','):
+                self.add_term(tag, weight)
+            self.max_id = max(self.max_id, wallpaper_id)
+
+
+class SuggestIndex:
+    """Sorted term array with bisect prefix search.
+
+    Builds read the database and sort outside ``_lock``; lookups only wait
+    for the final swap. ``_build_lock`` keeps one build running at a time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._terms = []        # sorted, lowercased
+        self._weights = {}      # term -> weight
+        self._display = {}      # term -> original spelling
+        self._max_id = 0
+        self._version = None
+        self._built_at = None
+
+    def _wallpaper_rows(self, after_id=0):
+        return DesktopWallpaper.objects.filter(id__gt=after_id).values_list(
+            'id', 'title', 'tags', 'downloads_count'
+        ).order_by('id').iterator()
+
+    def _stale(self):
+        return self._built_at is None or time.monotonic() - self._built_at > SUGGEST_REBUILD_SECONDS
+
+    def rebuild(self):
+        """Load every term from the database"""
+        with self._build_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        # Caller holds the build lock
+        version = get_catalog_version()
+        batch = TermBatch()
+        batch.add_wallpapers(self._wallpaper_rows())
+        categories = Category.objects.filter(is_active=True).values_list(
+            'name', 'desktop_downloads_count'
+        )
+        for name, downloads in categories:
+            batch.add_term(name, downloads + 1)
+        terms = sorted(batch.weights)
+        with self._lock:
+            self._terms = terms
+            self._weights = batch.weights
+            self._display = batch.display
+            self._max_id = batch.max_id
+            self._version = version
+            self._built_at = time.monotonic()
+
+    def _load_new(self, version):
+        # Caller holds the build lock
+        batch = TermBatch()
+        batch.add_wallpapers(self._wallpaper_rows(after_id=self._max_id))
+        added = sorted(key for key in batch.weights if key not in self._weights)
+        terms = list(heapq.merge(self._terms, added)) if added else self._terms
+        with self._lock:
+            for key, weight in batch.weights.items():
+                self._weights[key] = self._weights.get(key, 0) + weight
+                self._display.setdefault(key, batch.display[key])
+            self._terms = terms
+            self._max_id = max(self._max_id, batch.max_id)
+            self._version = version
+
+    def refresh(self):
+        """Bring the index up to date, loading only new wallpapers if possible"""
+        if self._built_at is None:
+            # Nothing to serve yet, so wait for the first build
+            blocking = True
+        elif self._stale() or get_catalog_version() != self._version:
+            # Keep serving the current terms while another request builds
+            blocking = False
+        else:
+            return
+        if not self._build_lock.acquire(blocking=blocking):
+            return
+        try:
+            if self._stale():
+                self._rebuild()
+                return
+            version = get_catalog_version()
+            if version != self._version:
+                self._load_new(version)
+        finally:
+            self._build_lock.release()
+
+    def suggest(self, prefix, limit=10):
+        """Top ``limit`` terms starting with ``prefix``, heaviest first"""
+        key = ' '.join(prefix.split()).lower()
+        if not key:
+            return []
+        self.refresh()
+        with self._lock:
+            start = bisect_left(self._terms, key)
+            end = bisect_left(self._terms, key + '\uffff', lo=start)
+            matches = heapq.nlargest(
+                limit,
+                self._terms[start:end],
+                key=lambda term: (self._weights[term], -len(term)),
+            )
+            return [self._display[term] for term in matches]
+
+
+suggest_index = SuggestIndex()
@@ -1,6 +1,8 @@
 # wallpapers/templatetags/wallpaper_tags.py
 from django import template
+from django.utils.html import json_script
 from wallpapers.models import DesktopWallpaper, MobileWallpaper
+from wallpapers.status import wallpaper_status
 
 register = template.Library()
 
@@ -21,4 +23,16 @@ def is_desktop(wallpaper):
 @register.filter
 def is_mobile(wallpaper):
     """Returns True if wallpaper is MobileWallpaper"""
-    return isinstance(wallpaper, MobileWallpaper)
\ No newline at end of file
+    return isinstance(wallpaper, MobileWallpaper)
+
+@register.simple_tag(takes_context=True)
+def wallpaper_status_json(context, wallpapers, element_id='wallpaper-status'):
+    """Embeds liked/favorited flags for a server-rendered grid as a JSON
+    <script>, so the page doesn't need to ask for them after loading"""
+    request = context.get('request')
+    if request is None:
+        return ''
+    ids = [wallpaper.id for wallpaper in wallpapers]
+    status = wallpaper_status(request.session, ids)
+    return json_script({str(wallpaper_id): flags for wallpaper_id, flags in status.items()}, element_id)
+
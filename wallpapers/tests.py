@@ -1,3 +1,137 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .analytics import analytics_writer
+from .counters import counter_buffer
+from .downloads import stream_remote_image
+from .models import Category, DesktopWallpaper, DownloadAnalytics
+from .upstream import UPSTREAM_MAX_CONCURRENCY, BulkheadFull, HostGuard, upstream_guard
+
+
+class DownloadOffloadTests(TestCase):
+    """X-Accel-Redirect / X-Sendfile responses, using a local file as the stand-in"""
+
+    def setUp(self):
+        # Write counters and analytics inside the test transaction
+        patcher = mock.patch.object(analytics_writer, 'enabled', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(counter_buffer.flush)
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        os.makedirs(os.path.join(self.media_root, 'wallpapers'))
+        with open(os.path.join(self.media_root, 'wallpapers', 'sunset.jpg'), 'wb') as f:
+            f.write(b'\xff\xd8' + b'0' * 1024)
+
+        category = Category.objects.create(name='Nature')
+        self.wallpaper = DesktopWallpaper.objects.create(
+            title='Sunset',
+            category=category,
+            image_url='wallpapers/sunset.jpg',
+            thumbnail_url='https://example.com/thumb.jpg',
+            resolution_width=1920,
+            resolution_height=1080,
+        )
+        self.url = reverse('wallpapers:download', args=[self.wallpaper.id])
+
+    def test_x_accel_redirect(self):
+        with override_settings(MEDIA_ROOT=self.media_root, DOWNLOAD_OFFLOAD='x-accel'):
+            response = self.client.get(self.url, secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/internal/media/wallpapers/sunset.jpg')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="sunset.jpg"')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response.content, b'')
+
+        # Counting and analytics still happen in Django
+        counter_buffer.flush()
+        self.wallpaper.refresh_from_db()
+        self.assertEqual(self.wallpaper.downloads_count, 1)
+        self.assertEqual(DownloadAnalytics.objects.filter(wallpaper_id=self.wallpaper.id).count(), 1)
+
+    def test_x_sendfile(self):
+        with override_settings(MEDIA_ROOT=self.media_root, DOWNLOAD_OFFLOAD='x-sendfile'):
+            response = self.client.get(self.url, secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(os.path.abspath(self.media_root), 'wallpapers', 'sunset.jpg'),
+        )
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="sunset.jpg"')
+
+    def test_remote_image_x_accel_redirect(self):
+        DesktopWallpaper.objects.filter(id=self.wallpaper.id).update(
+            image_url='https://i.ibb.co/abc123/sunset.jpg'
+        )
+        with override_settings(MEDIA_ROOT=self.media_root, DOWNLOAD_OFFLOAD='x-accel'):
+            response = self.client.get(self.url, secure=True)
+
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/internal/remote/https/i.ibb.co/abc123/sunset.jpg'
+        )
+
+    def test_offload_disabled_serves_file(self):
+        with override_settings(MEDIA_ROOT=self.media_root, DOWNLOAD_OFFLOAD=''):
+            response = self.client.get(self.url, secure=True)
+
+        self.assertNotIn('X-Accel-Redirect', response)
+        self.assertEqual(b''.join(response.streaming_content), b'\xff\xd8' + b'0' * 1024)
+        response.close()
+
+
+class RemoteStreamTests(TestCase):
+    """Upstream fetches give their host slot back however the response ends"""
+
+    def setUp(self):
+        self.upstream = mock.Mock(status_code=200, headers={'Content-Type': 'image/jpeg'})
+        self.upstream.iter_content.return_value = iter([b'ab', b'cd'])
+        session = mock.Mock()
+        session.get.return_value = self.upstream
+        patcher = mock.patch('wallpapers.downloads.get_session', return_value=session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.cache = mock.Mock()
+        self.guard = upstream_guard.for_url('https://images.example.com/a.jpg')
+
+    def stream(self):
+        return stream_remote_image('https://images.example.com/a.jpg', 'a.jpg', cache=self.cache)
+
+    def test_close_before_first_chunk_releases_slot(self):
+        for _ in range(UPSTREAM_MAX_CONCURRENCY + 1):
+            self.stream().close()
+
+        self.assertEqual(self.guard.in_flight, 0)
+        self.assertEqual(self.upstream.close.call_count, UPSTREAM_MAX_CONCURRENCY + 1)
+        self.cache.writer.return_value.abort.assert_called()
+        self.cache.writer.return_value.commit.assert_not_called()
+
+    def test_full_stream_commits_once(self):
+        response = self.stream()
+        self.assertEqual(b''.join(response.streaming_content), b'abcd')
+        response.close()
+
+        self.assertEqual(self.guard.in_flight, 0)
+        self.upstream.close.assert_called_once()
+        self.cache.writer.return_value.commit.assert_called_once()
+        self.cache.writer.return_value.abort.assert_not_called()
+
+    def test_slots_are_shared_across_workers(self):
+        # Two guards for one host stand in for two worker processes
+        workers = [HostGuard('shared.example.com'), HostGuard('shared.example.com')]
+        slots = [workers[i % 2].acquire() for i in range(UPSTREAM_MAX_CONCURRENCY)]
+        with mock.patch('wallpapers.upstream.UPSTREAM_QUEUE_WAIT', 0):
+            with self.assertRaises(BulkheadFull):
+                workers[0].acquire()
+
+        for i, slot in enumerate(slots):
+            workers[i % 2].release(slot, failed=False)
+        workers[1].release(workers[1].acquire(), failed=False)
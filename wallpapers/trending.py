@@ -0,0 +1,254 @@
+# wallpapers/trending.py
+"""Forward-decayed trending scores.
+
+Every engagement event adds ``weight * 2 ** ((t - landmark) / half_life)``
+to its wallpaper's ``trending_score``, where ``t`` is when the event
+happened and the landmark is a fixed moment stored in the job checkpoint.
+Because the decay is applied forward from the landmark, old contributions
+never have to be rewritten: ranking by the stored score is the same as
+ranking by ``sum(weight * 2 ** ((t - now) / half_life))``, so the trending
+page is a plain ``ORDER BY trending_score DESC LIMIT k`` on an index.
+
+``update_trending`` is incremental:
+
+* downloads come from ``DownloadAnalytics`` rows after the checkpoint's
+  ``last_id``, grouped per wallpaper and hour, weighted at that hour;
+* views, likes and favorites have no event log, so each wallpaper keeps
+  the weighted engagement total it was last scored at
+  (``trending_engagement_seen``) and only rows whose counters moved are
+  read and credited at the time of the run.
+
+The landmark is moved forward (and every score scaled down by the same
+factor) before the multipliers grow large, and the top
+TRENDING_TOP_K wallpapers per type are flagged ``is_trending``.
+"""
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, IntegerField, PositiveBigIntegerField, Value, When
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .cache import bump_catalog_version
+from .models import DesktopWallpaper, DownloadAnalytics, JobCheckpoint, MobileWallpaper
+
+TRENDING_HALF_LIFE_HOURS = getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 24)
+TRENDING_TOP_K = getattr(settings, 'TRENDING_TOP_K', 100)
+
+# Integer weight per event
+TRENDING_WEIGHTS = getattr(settings, 'TRENDING_WEIGHTS', {
+    'download': 10,
+    'view': 1,
+    'like': 20,
+    'favorite': 30,
+})
+
+# Rebase once the multiplier reaches 2 ** (this / half-life)
+LANDMARK_MAX_AGE = timedelta(days=30)
+
+# Scores that have decayed below this after a rebase are zeroed
+MIN_SCORE = 1e-6
+
+CHECKPOINT_NAME = 'trending'
+
+TRENDING_MODELS = {
+    'desktop': DesktopWallpaper,
+    'mobile': MobileWallpaper,
+}
+
+BATCH_SIZE = 500
+
+
+def decay_multiplier(moment, landmark):
+    """Forward-decay weight of an event at ``moment``"""
+    hours = (moment - landmark).total_seconds() / 3600
+    return 2 ** (hours / TRENDING_HALF_LIFE_HOURS)
+
+
+def engagement_expression(weights=None):
+    """Weighted counter total, as stored in ``trending_engagement_seen``"""
+    weights = weights or TRENDING_WEIGHTS
+    return (
+        F('views_count') * weights['view']
+        + F('likes_count') * weights['like']
+        + F('favorites_count') * weights['favorite']
+    )
+
+
+def engagement(views=0, likes=0, favorites=0):
+    """Weighted counter total for plain values"""
+    return (
+        views * TRENDING_WEIGHTS['view']
+        + likes * TRENDING_WEIGHTS['like']
+        + favorites * TRENDING_WEIGHTS['favorite']
+    )
+
+
+def _case(values, output_field, default=None):
+    """``CASE id WHEN ... END`` over ``{id: value}``"""
+    return Case(
+        *[When(pk=pk, then=Value(value)) for pk, value in values.items()],
+        default=default,
+        output_field=output_field,
+    )
+
+
+def rebaseline(model, weights=None):
+    """Mark current counters as already scored (no score change)"""
+    return model.objects.update(
+        trending_engagement_seen=engagement_expression(weights)
+    )
+
+
+def rebase(landmark, now):
+    """Move the landmark to ``now``, scaling every score to match"""
+    factor = 1 / decay_multiplier(now, landmark)
+    for model in TRENDING_MODELS.values():
+        model.objects.filter(trending_score__gt=0).update(
+            trending_score=F('trending_score') * factor
+        )
+        model.objects.filter(trending_score__gt=0, trending_score__lt=MIN_SCORE).update(
+            trending_score=0
+        )
+    return now
+
+
+def download_scores(after_id, upto_id, landmark):
+    """``{wallpaper_type: {id: score}}`` for download events in (after_id, upto_id]"""
+    rows = (
+        DownloadAnalytics.objects
+        .filter(id__gt=after_id, id__lte=upto_id)
+        .annotate(hour=TruncHour('timestamp'))
+        .order_by()
+        .values('wallpaper_type', 'wallpaper_id', 'hour')
+        .annotate(events=Count('id'))
+    )
+    scores = {wallpaper_type: {} for wallpaper_type in TRENDING_MODELS}
+    for row in rows.iterator(chunk_size=2000):
+        per_type = scores.get(row['wallpaper_type'])
+        if per_type is None:
+            continue
+        # Credit each hour at its midpoint
+        moment = row['hour'] + timedelta(minutes=30)
+        weight = row['events'] * TRENDING_WEIGHTS['download'] * decay_multiplier(moment, landmark)
+        per_type[row['wallpaper_id']] = per_type.get(row['wallpaper_id'], 0) + weight
+    return scores
+
+
+def counter_scores(model, multiplier):
+    """Score counter growth since the last run.
+
+    Returns ``({id: score}, {id: engagement})`` for rows whose weighted
+    engagement differs from ``trending_engagement_seen``. Drops (unlikes)
+    move the baseline but never lower a score.
+    """
+    rows = (
+        model.objects
+        .annotate(engagement=engagement_expression())
+        .exclude(engagement=F('trending_engagement_seen'))
+        .values_list('id', 'engagement', 'trending_engagement_seen')
+    )
+    scores, seen = {}, {}
+    for wallpaper_id, engagement, previous in rows.iterator(chunk_size=2000):
+        seen[wallpaper_id] = engagement
+        if engagement > previous:
+            scores[wallpaper_id] = (engagement - previous) * multiplier
+    return scores, seen
+
+
+def apply_scores(model, scores, seen):
+    """Add ``scores`` and store ``seen`` baselines, one UPDATE per batch"""
+    ids = sorted(set(scores) | set(seen))
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = ids[start:start + BATCH_SIZE]
+        changes = {}
+        batch_scores = {pk: scores[pk] for pk in batch if pk in scores}
+        if batch_scores:
+            changes['trending_score'] = F('trending_score') + _case(
+                batch_scores, FloatField(), default=Value(0.0)
+            )
+        batch_seen = {pk: seen[pk] for pk in batch if pk in seen}
+        if batch_seen:
+            changes['trending_engagement_seen'] = _case(
+                batch_seen, PositiveBigIntegerField(), default=F('trending_engagement_seen')
+            )
+        model.objects.filter(pk__in=batch).update(**changes)
+
+
+def flag_top(model):
+    """Flag the top TRENDING_TOP_K rows; returns their ids in rank order"""
+    top = list(
+        model.objects.filter(trending_score__gt=0)
+        .order_by('-trending_score', '-id')
+        .values_list('id', 'trending_score')[:TRENDING_TOP_K]
+    )
+    ids = [pk for pk, _ in top]
+    model.objects.filter(is_trending=True).exclude(pk__in=ids).update(
+        is_trending=False, trending_percentage=0
+    )
+    if top:
+        leader = top[0][1]
+        percentages = {pk: max(1, round(100 * score / leader)) for pk, score in top}
+        model.objects.filter(pk__in=ids).update(
+            is_trending=True,
+            trending_percentage=_case(percentages, IntegerField()),
+        )
+    return ids
+
+
+def update_trending(now=None):
+    """Score events since the last run and reflag the top wallpapers.
+
+    Returns a summary dict for the management command.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        checkpoint, _ = JobCheckpoint.objects.select_for_update().get_or_create(
+            name=CHECKPOINT_NAME
+        )
+        data = checkpoint.data
+        summary = {'rebased': False, 'rebaselined': False}
+
+        landmark = data.get('landmark')
+        landmark = datetime.fromisoformat(landmark) if landmark else now
+        if now - landmark > LANDMARK_MAX_AGE:
+            landmark = rebase(landmark, now)
+            summary['rebased'] = True
+
+        # New weights would credit every wallpaper at once; start over from here
+        if data.get('weights') != TRENDING_WEIGHTS:
+            for model in TRENDING_MODELS.values():
+                rebaseline(model)
+            summary['rebaselined'] = True
+
+        upto_id = DownloadAnalytics.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        downloads = download_scores(checkpoint.last_id, upto_id, landmark)
+        summary['last_id'] = upto_id
+
+        multiplier = decay_multiplier(now, landmark)
+        changed = False
+        for wallpaper_type, model in TRENDING_MODELS.items():
+            scores, seen = counter_scores(model, multiplier)
+            for pk, score in downloads[wallpaper_type].items():
+                scores[pk] = scores.get(pk, 0) + score
+            apply_scores(model, scores, seen)
+
+            previous = data.get('top', {}).get(wallpaper_type)
+            top = flag_top(model)
+            changed = changed or top != previous
+            data.setdefault('top', {})[wallpaper_type] = top
+            summary[wallpaper_type] = len(scores)
+
+        data['landmark'] = landmark.isoformat()
+        data['weights'] = TRENDING_WEIGHTS
+        checkpoint.last_id = max(checkpoint.last_id, upto_id)
+        checkpoint.data = data
+        checkpoint.save()
+
+    # Home and trending pages are cached per catalog version
+    if changed:
+        bump_catalog_version()
+    summary['changed'] = changed
+    return summary
@@ -0,0 +1,181 @@
+# wallpapers/upstream.py
+"""Bulkhead and circuit breaker for upstream image hosts.
+
+Each upstream host gets at most UPSTREAM_MAX_CONCURRENCY in-flight fetches
+across all workers. The slots are UPSTREAM_MAX_CONCURRENCY keys in the
+shared cache, taken with ``cache.add`` and deleted on release; each expires
+after UPSTREAM_SLOT_TTL seconds so a killed worker cannot leak one for
+good. The limit is only global with a shared cache backend (Redis,
+memcached); with the default local-memory cache it applies per worker,
+which does nothing for sync workers that serve one request at a time.
+
+A request waits up to UPSTREAM_QUEUE_WAIT seconds for a slot and is
+rejected otherwise. After UPSTREAM_FAILURE_THRESHOLD consecutive failures
+the host's breaker (per worker) opens and fetches are refused outright for
+UPSTREAM_OPEN_SECONDS, then a single trial request decides whether it
+closes again. Rejections raise ``requests.RequestException`` subclasses,
+so callers fall back exactly as they do for network errors.
+"""
+
+import logging
+import random
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Keep this below the worker count so a hung host can't tie up every worker
+UPSTREAM_MAX_CONCURRENCY = getattr(settings, 'UPSTREAM_MAX_CONCURRENCY', 4)
+UPSTREAM_SLOT_TTL = getattr(settings, 'UPSTREAM_SLOT_TTL', 120)
+UPSTREAM_QUEUE_WAIT = getattr(settings, 'UPSTREAM_QUEUE_WAIT', 0.5)
+UPSTREAM_FAILURE_THRESHOLD = getattr(settings, 'UPSTREAM_FAILURE_THRESHOLD', 5)
+UPSTREAM_OPEN_SECONDS = getattr(settings, 'UPSTREAM_OPEN_SECONDS', 30)
+
+SLOT_KEY = 'upstream:slot:{}:{}'
+SLOT_POLL_INTERVAL = 0.05
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitOpen(requests.RequestException):
+    """The host's breaker is open"""
+
+
+class BulkheadFull(requests.RequestException):
+    """No fetch slot for the host became free in time"""
+
+
+class HostGuard:
+    """Concurrency limit and breaker state for one upstream host"""
+
+    def __init__(self, host):
+        self.host = host
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.in_flight = 0
+        self.rejected = 0
+        self.short_circuited = 0
+
+    def _allow(self):
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < UPSTREAM_OPEN_SECONDS:
+                    self.short_circuited += 1
+                    return False
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self.trial_in_flight:
+                    self.short_circuited += 1
+                    return False
+                self.trial_in_flight = True
+            return True
+
+    def _take_slot(self):
+        """A free shared slot as ``(key, token)``, or None if all are taken"""
+        token = uuid.uuid4().hex
+        # Random order spreads workers over the slot keys
+        for index in random.sample(range(UPSTREAM_MAX_CONCURRENCY), UPSTREAM_MAX_CONCURRENCY):
+            key = SLOT_KEY.format(self.host, index)
+            if cache.add(key, token, UPSTREAM_SLOT_TTL):
+                return key, token
+        return None
+
+    def acquire(self):
+        """Take a fetch slot or raise CircuitOpen / BulkheadFull.
+
+        Returns the slot to hand back to ``release()``.
+        """
+        if not self._allow():
+            raise CircuitOpen(f'Circuit open for {self.host}')
+        deadline = time.monotonic() + UPSTREAM_QUEUE_WAIT
+        try:
+            while True:
+                slot = self._take_slot()
+                if slot or time.monotonic() >= deadline:
+                    break
+                time.sleep(SLOT_POLL_INTERVAL)
+        except Exception as e:
+            # The cache being down shouldn't take downloads with it
+            logger.error(f"Upstream slot lookup failed for {self.host}: {e}")
+            slot = (None, None)
+        if slot is None:
+            with self._lock:
+                self.rejected += 1
+                self.trial_in_flight = False
+            raise BulkheadFull(f'Too many concurrent fetches from {self.host}')
+        with self._lock:
+            self.in_flight += 1
+        return slot
+
+    def release(self, slot, failed):
+        """Return the slot and record the outcome (``None``: no outcome)"""
+        with self._lock:
+            self.in_flight -= 1
+            self.trial_in_flight = False
+            if failed is None:
+                # A half-open breaker just lets the next request be the trial
+                pass
+            elif failed:
+                self.failures += 1
+                if self.state == HALF_OPEN or self.failures >= UPSTREAM_FAILURE_THRESHOLD:
+                    self.state = OPEN
+                    self.opened_at = time.monotonic()
+            else:
+                self.failures = 0
+                self.state = CLOSED
+        key, token = slot
+        if key is None:
+            return
+        try:
+            # Only delete it if it hasn't expired and gone to someone else
+            if cache.get(key) == token:
+                cache.delete(key)
+        except Exception as e:
+            logger.error(f"Upstream slot release failed for {self.host}: {e}")
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'in_flight': self.in_flight,
+                'consecutive_failures': self.failures,
+                'rejected': self.rejected,
+                'short_circuited': self.short_circuited,
+            }
+
+
+class UpstreamGuard:
+    """Per-host guards, created on first use"""
+
+    def __init__(self):
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url):
+        host = urlparse(url).netloc.lower()
+        guard = self._hosts.get(host)
+        if guard is None:
+            with self._lock:
+                guard = self._hosts.setdefault(host, HostGuard(host))
+        return guard
+
+    def metrics(self):
+        return {host: guard.metrics() for host, guard in list(self._hosts.items())}
+
+
+upstream_guard = UpstreamGuard()
+
+metrics.register('upstream', upstream_guard.metrics)
@@ -1,12 +1,11 @@
 from django.urls import path
 from . import views
 from django.contrib.sitemaps.views import sitemap
-from .sitemaps import StaticViewSitemap, CategorySitemap, WallpaperSitemap
+from .sitemaps import StaticViewSitemap, CategorySitemap
 app_name = 'wallpapers'
 sitemaps = {
     'static': StaticViewSitemap,
     'categories': CategorySitemap,
-    'wallpapers': WallpaperSitemap,
 }
 urlpatterns = [
     # Homepage
@@ -19,6 +18,9 @@ urlpatterns = [
     path('categories/', views.category_list, name='categories'),
     path('category/<slug:slug>/', views.category_detail, name='category_detail'),
     
+    # Tags
+    path('tag/<str:slug>/', views.tag_detail, name='tag_detail'),
+    
     # Wallpaper detail
     path('wallpaper/<int:id>/', views.wallpaper_detail, name='wallpaper_detail'),
     
@@ -41,6 +43,10 @@ urlpatterns = [
     # API endpoints
     path('api/wallpapers/', views.api_wallpaper_list, name='api_wallpaper_list'),
     path('api/favorites/', views.api_favorites, name='api_favorites'),
+    path('api/status/', views.api_status, name='api_status'),
+    path('api/hot/', views.api_hot, name='api_hot'),
+    path('api/search/suggest/', views.api_search_suggest, name='api_search_suggest'),
+    path('api/metrics/', views.api_metrics, name='api_metrics'),
     
     # Trending
     path('trending/', views.trending_wallpapers, name='trending'),
@@ -51,5 +57,10 @@ urlpatterns = [
     path('cookie-policy/', views.cookie_policy, name='cookie_policy'),
     path('dmca/', views.dmca, name='dmca'),
     
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    # Sitemaps: index, small Django sections and pre-generated wallpaper sections
+    path('sitemap.xml', views.sitemap_index, name='sitemap_index'),
+    path('sitemap-<str:section>.xml', sitemap, {'sitemaps': sitemaps},
+         name='sitemap_section'),
+    path('sitemaps/wallpapers-<int:section>.xml.gz', views.sitemap_wallpapers,
+         name='sitemap_wallpapers'),
 ]
\ No newline at end of file
@@ -1,18 +1,41 @@
-from django.db.models import Q, F, Count, Sum, Avg
+from django.db import transaction
+from django.db.models import F, Count, Sum, Avg
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse, HttpResponse
+from django.contrib.sites.shortcuts import get_current_site
+from django.http import FileResponse, Http404, JsonResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.views.decorators.cache import cache_page
+from django.utils.cache import patch_cache_control
 from django.core.paginator import Paginator
 import json
 from datetime import datetime, timedelta
-import hashlib
-import random
-from .models import DesktopWallpaper, Category, DownloadAnalytics
+from .models import DesktopWallpaper, DesktopWallpaperTag, Category, FeaturedSchedule, Tag, attach_wallpapers
+from . import metrics
+from .analytics import analytics_writer
+from .cache import get_or_build, get_nav_categories
+from .colors import color_bucket, color_filter_ids, search_by_color
+from .conditional import conditional_view
+from .counters import counter_buffer
+from .download_cache import download_cache
+from .hot import HOT_PUBLISH_INTERVAL, HOT_TOP_K, HOT_WINDOW_SECONDS, hot_tracker, hot_wallpaper_ids, hot_wallpapers
+from .downloads import (
+    is_resumed_request, local_image_path, offload_remote, serve_cached_image, serve_local_image,
+    stream_remote_image,
+)
+from .pagination import KeysetPaginator, encode_cursor
+from .sampling import random_wallpaper_id
+from .search import search_wallpapers
+from . import sitemap_files
+from .serializers import (
+    CATEGORY_SERIALIZER, FAVORITES_SERIALIZER, LIST_SERIALIZER, compact_json_response,
+)
+from .status import parse_ids, wallpaper_status
+from .suggest import suggest_index
 import os
 from urllib.parse import urlparse
 import requests
 from django.conf import settings
-from io import BytesIO
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 
 def download_wallpaper(request, id):
@@ -20,34 +43,21 @@ def download_wallpaper(request, id):
     wallpaper = get_object_or_404(DesktopWallpaper, id=id)
     
     try:
-        # Increment download count atomically
-        DesktopWallpaper.objects.filter(id=id).update(
-            downloads_count=F('downloads_count') + 1
-        )
-        
-        # Refresh to get updated count
-        wallpaper.refresh_from_db()
-        
-        # Create analytics record
-        ip_address = request.META.get('REMOTE_ADDR', '')
-        if ip_address:
-            ip_hash = hashlib.sha256(ip_address.encode()).hexdigest()[:64]
-        else:
-            ip_hash = ''
-        
-        user_agent = request.META.get('HTTP_USER_AGENT', '')[:500]
-        
-        try:
-            DownloadAnalytics.objects.create(
+        # Resumed downloads (Range from a non-zero offset) were counted already
+        if not is_resumed_request(request):
+            # Count the download (flushed in batches)
+            counter_buffer.add(id, 'downloads_count', category_id=wallpaper.category_id)
+            hot_tracker.record(id, 'download')
+            
+            # Queue analytics record (hashed and written in the background)
+            analytics_writer.record(
                 wallpaper_type='desktop',
                 wallpaper_id=id,
                 session_id=request.session.session_key or '',
                 device_type='desktop',
-                user_agent=user_agent,
-                ip_hash=ip_hash
+                user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                ip_address=request.META.get('REMOTE_ADDR', ''),
             )
-        except Exception as e:
-            print(f"Analytics error: {e}")
         
         # Get file extension from URL
         image_url = wallpaper.image_url
@@ -74,35 +84,26 @@ def download_wallpaper(request, id):
             
             filename = f"{safe_title}_{wallpaper.resolution_width}x{wallpaper.resolution_height}.{extension}"
         
-        # For external URLs, we need to fetch the image first
+        # For external URLs, serve from the local cache or stream the image
+        # through a pooled connection (filling the cache on the way)
         if image_url.startswith('http'):
+            cached = download_cache.lookup(image_url)
+            if cached:
+                return serve_cached_image(request, cached, filename, download_cache.directory)
+            offloaded = offload_remote(image_url, filename)
+            if offloaded:
+                return offloaded
             try:
-                # Fetch the image
-                response = requests.get(image_url, stream=True, timeout=30)
-                response.raise_for_status()
-                
-                # Create HTTP response with image data
-                img_data = BytesIO(response.content)
-                img_response = HttpResponse(img_data.getvalue(), content_type=response.headers.get('Content-Type', 'image/jpeg'))
-                
-                # Set Content-Disposition header to trigger download
-                img_response['Content-Disposition'] = f'attachment; filename="{filename}"'
-                img_response['Content-Length'] = len(response.content)
-                
-                return img_response
-                
+                return stream_remote_image(image_url, filename, cache=download_cache)
             except requests.RequestException as e:
                 print(f"Error fetching image: {e}")
                 # Fallback: redirect to image URL
                 return redirect(image_url)
         else:
             # For local files
-            file_path = os.path.join(settings.MEDIA_ROOT, image_url)
-            if os.path.exists(file_path):
-                with open(file_path, 'rb') as f:
-                    response = HttpResponse(f.read(), content_type='image/jpeg')
-                    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-                    return response
+            file_path = local_image_path(image_url)
+            if file_path:
+                return serve_local_image(request, file_path, filename)
             else:
                 return redirect(image_url)
                 
@@ -121,32 +122,33 @@ def toggle_like(request, id):
     if request.method != 'POST':
         return JsonResponse({'success': False, 'error': 'Method not allowed'}, status=405)
     
-    wallpaper = get_object_or_404(DesktopWallpaper, id=id)
-    
     # Check if user has already liked (using session)
     session_key = f'liked_{id}'
     already_liked = request.session.get(session_key, False)
     
+    # Wallpaper and category counts move together, and only when the
+    # wallpaper's count actually changed (an unlike at zero is a no-op)
+    with transaction.atomic():
+        result = DesktopWallpaper.mutate_counter(id, 'likes_count', -1 if already_liked else 1)
+        if result is None:
+            raise Http404('Wallpaper not found')
+        likes_count, category_id, changed = result
+        if changed:
+            Category.adjust_desktop_stats(category_id, likes=-1 if already_liked else 1)
+    
     if already_liked:
         # Unlike - decrease count
-        DesktopWallpaper.objects.filter(id=id).update(
-            likes_count=F('likes_count') - 1
-        )
         request.session[session_key] = False
         action = 'unliked'
     else:
         # Like - increase count
-        DesktopWallpaper.objects.filter(id=id).update(
-            likes_count=F('likes_count') + 1
-        )
+        hot_tracker.record(id, 'like')
         request.session[session_key] = True
         action = 'liked'
     
-    wallpaper.refresh_from_db()
-    
     return JsonResponse({
         'success': True, 
-        'likes_count': wallpaper.likes_count,
+        'likes_count': likes_count,
         'action': action,
         'is_liked': not already_liked
     })
@@ -158,18 +160,19 @@ def toggle_favorite(request, id):
     if request.method != 'POST':
         return JsonResponse({'success': False, 'error': 'Method not allowed'}, status=405)
     
-    wallpaper = get_object_or_404(DesktopWallpaper, id=id)
-    
     # Check if user has already favorited (using session)
     session_key = f'favorited_{id}'
     timestamp_key = f'favorited_timestamp_{id}'
     already_favorited = request.session.get(session_key, False)
     
+    # Update and read back the count in one statement (never below zero)
+    result = DesktopWallpaper.mutate_counter(id, 'favorites_count', -1 if already_favorited else 1)
+    if result is None:
+        raise Http404('Wallpaper not found')
+    favorites_count = result[0]
+    
     if already_favorited:
         # Unfavorite - decrease count
-        DesktopWallpaper.objects.filter(id=id).update(
-            favorites_count=F('favorites_count') - 1
-        )
         request.session[session_key] = False
         # Remove timestamp when unfavoriting
         if timestamp_key in request.session:
@@ -177,20 +180,15 @@ def toggle_favorite(request, id):
         action = 'unfavorited'
     else:
         # Favorite - increase count
-        DesktopWallpaper.objects.filter(id=id).update(
-            favorites_count=F('favorites_count') + 1
-        )
         request.session[session_key] = True
         # Store timestamp when favoriting
         from datetime import datetime
         request.session[timestamp_key] = datetime.now().isoformat()
         action = 'favorited'
     
-    wallpaper.refresh_from_db()
-    
     return JsonResponse({
         'success': True, 
-        'favorites_count': wallpaper.favorites_count,
+        'favorites_count': favorites_count,
         'action': action,
         'is_favorited': not already_favorited,
         'timestamp': request.session.get(timestamp_key, '') if not already_favorited else ''
@@ -217,43 +215,134 @@ def get_favorite_status(request, id):
         'is_favorited': is_favorited
     })
 
+@csrf_exempt
+def api_status(request):
+    """Liked/favorited flags for many wallpapers in one response.
+
+    Takes ``?ids=1,2,3`` or a POST body (JSON ``{"ids": [...]}`` or form
+    ``ids=1,2,3``) for grids with too many ids for a query string.
+    """
+    if request.method == 'POST':
+        if request.content_type == 'application/json':
+            try:
+                ids = parse_ids(json.loads(request.body or b'{}').get('ids', []))
+            except (ValueError, AttributeError):
+                return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+        else:
+            ids = parse_ids(request.POST.get('ids', ''))
+    else:
+        ids = parse_ids(request.GET.get('ids', ''))
+    
+    status = wallpaper_status(request.session, ids)
+    
+    return JsonResponse({
+        'success': True,
+        'status': {str(wallpaper_id): flags for wallpaper_id, flags in status.items()},
+    })
+
+@conditional_view()
 def api_wallpaper_list(request):
-    """API endpoint for infinite scroll - DESKTOP ONLY"""
-    page = int(request.GET.get('page', 1))
+    """API endpoint for infinite scroll - DESKTOP ONLY
+    
+    Pass ``?cursor=`` (empty for the first page) to use keyset pagination;
+    each response then carries ``next_cursor`` for the following page.
+    ``?color=#rrggbb`` limits the feed to wallpapers near that color.
+    """
     per_page = 24
     
-    wallpapers = DesktopWallpaper.objects.all().order_by('-created_at')
-    
-    # Pagination manually for API
-    start = (page - 1) * per_page
-    end = start + per_page
-    
-    paginated_wallpapers = wallpapers[start:end]
-    
-    # Serialize wallpapers
-    wallpaper_list = []
-    for wallpaper in paginated_wallpapers:
-        wallpaper_list.append({
-            'id': wallpaper.id,
-            'title': wallpaper.title,
-            'thumbnail_url': wallpaper.thumbnail_url,
-            'image_url': wallpaper.image_url,
-            'resolution_width': wallpaper.resolution_width,
-            'resolution_height': wallpaper.resolution_height,
-            'quality_label': wallpaper.quality_label,
-            'likes_count': wallpaper.likes_count,
-            'favorites_count': wallpaper.favorites_count,
-            'downloads_count': wallpaper.downloads_count,
-            'is_trending': wallpaper.is_trending,
-            'created_at': wallpaper.created_at.isoformat() if wallpaper.created_at else None,
-        })
+    wallpapers = DesktopWallpaper.objects.all()
     
-    return JsonResponse({
-        'wallpapers': wallpaper_list,
-        'has_next': end < wallpapers.count(),
+    # ?color=#rrggbb keeps wallpapers with a palette color in a nearby bucket
+    color = request.GET.get('color')
+    if color:
+        color_ids = color_filter_ids(color)
+        if color_ids is None:
+            return JsonResponse({'success': False, 'error': 'Invalid color'}, status=400)
+        wallpapers = wallpapers.filter(id__in=color_ids)
+    
+    serializer = LIST_SERIALIZER.for_request(request)
+    # created_at/id are always read so the next cursor can be built
+    wallpapers = serializer.queryset(wallpapers, 'created_at', 'id')
+    
+    if 'cursor' in request.GET:
+        try:
+            paginated_wallpapers, next_cursor = KeysetPaginator(wallpapers, per_page).page(
+                request.GET.get('cursor')
+            )
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Invalid cursor'}, status=400)
+        has_next = next_cursor is not None
+        page = None
+    else:
+        page = int(request.GET.get('page', 1))
+        
+        # Pagination manually for API
+        start = (page - 1) * per_page
+        end = start + per_page
+        
+        # Fetch one extra row instead of counting the whole table
+        paginated_wallpapers = list(wallpapers.order_by('-created_at', '-id')[start:end + 1])
+        has_next = len(paginated_wallpapers) > per_page
+        paginated_wallpapers = paginated_wallpapers[:per_page]
+        next_cursor = None
+        if has_next:
+            last = paginated_wallpapers[-1]
+            next_cursor = encode_cursor(last['created_at'], last['id'])
+    
+    return compact_json_response({
+        'wallpapers': serializer.rows(paginated_wallpapers),
+        'has_next': has_next,
+        'next_cursor': next_cursor,
         'page': page
     })
 
+def api_search_suggest(request):
+    """Autocomplete suggestions for the search box"""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', 8)), 1), 20)
+    except ValueError:
+        limit = 8
+    
+    return JsonResponse({
+        'query': query,
+        'suggestions': suggest_index.suggest(query, limit) if query else [],
+    })
+
+def api_hot(request):
+    """Wallpapers hot right now (last HOT_WINDOW_SECONDS), hottest first
+    
+    ``?limit=`` (default 12, at most HOT_TOP_K) and ``?fields=`` as for
+    the wallpaper list.
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', 12)), 1), HOT_TOP_K)
+    except ValueError:
+        limit = 12
+    
+    ids = hot_wallpaper_ids(limit)
+    serializer = LIST_SERIALIZER.for_request(request)
+    rows = {
+        row['id']: row
+        for row in serializer.queryset(DesktopWallpaper.objects.filter(id__in=ids), 'id')
+    }
+    
+    response = compact_json_response({
+        'wallpapers': serializer.rows(rows[pk] for pk in ids if pk in rows),
+        'window_seconds': HOT_WINDOW_SECONDS,
+    })
+    # Published estimates only change every HOT_PUBLISH_INTERVAL seconds
+    patch_cache_control(response, public=True, max_age=HOT_PUBLISH_INTERVAL)
+    return response
+
+def api_metrics(request):
+    """Per-worker runtime metrics - staff only"""
+    if not (settings.DEBUG or request.user.is_staff):
+        return JsonResponse({'success': False, 'error': 'Permission denied'}, status=403)
+    
+    return JsonResponse(metrics.snapshot())
+
+@conditional_view(private=True)
 def api_favorites(request):
     """API to get favorite wallpaper data from both session and localStorage"""
     # Check for localStorage IDs in request
@@ -286,28 +375,12 @@ def api_favorites(request):
         return JsonResponse({'wallpapers': []})
     
     # Fetch wallpapers that exist
-    wallpapers = DesktopWallpaper.objects.filter(id__in=list(all_favorite_ids))
-    
-    wallpaper_list = []
-    for wallpaper in wallpapers:
-        wallpaper_list.append({
-            'id': wallpaper.id,
-            'title': wallpaper.title or 'Untitled Wallpaper',
-            'thumbnail_url': wallpaper.thumbnail_url or 'https://via.placeholder.com/300x200',
-            'image_url': wallpaper.image_url or 'https://via.placeholder.com/1920x1080',
-            'resolution_width': wallpaper.resolution_width or 1920,
-            'resolution_height': wallpaper.resolution_height or 1080,
-            'quality_label': wallpaper.quality_label or 'HD',
-            'likes_count': wallpaper.likes_count or 0,
-            'favorites_count': wallpaper.favorites_count or 0,
-            'downloads_count': wallpaper.downloads_count or 0,
-            'views_count': wallpaper.views_count or 0,
-            'created_at': wallpaper.created_at.isoformat() if wallpaper.created_at else '2024-01-01T00:00:00Z',
-            'type': 'desktop',
-            'is_trending': wallpaper.is_trending or False
-        })
+    serializer = FAVORITES_SERIALIZER.for_request(request)
+    wallpapers = serializer.queryset(
+        DesktopWallpaper.objects.filter(id__in=list(all_favorite_ids))
+    )
     
-    return JsonResponse({'wallpapers': wallpaper_list})
+    return compact_json_response({'wallpapers': serializer.rows(wallpapers)})
 
 def category_list(request):
     """List all categories with counts"""
@@ -327,6 +400,7 @@ def category_list(request):
     }
     return render(request, 'wallpapers/categories.html', context)
 
+@conditional_view(private=True, vary=('X-Requested-With',))
 def category_detail(request, slug):
     """Show wallpapers in a specific category - DESKTOP ONLY"""
     category = get_object_or_404(Category, slug=slug, is_active=True)
@@ -345,134 +419,177 @@ def category_detail(request, slug):
     else:
         wallpapers = wallpapers.order_by(sort_by)
     
-    # Calculate total downloads for this category
-    total_downloads = wallpapers.aggregate(total=Sum('downloads_count'))['total'] or 0
-    
-    # Pagination
-    paginator = Paginator(wallpapers, 20)  # Show 20 per page
-    page_obj = paginator.get_page(page)
-    
     # Check if it's an AJAX request for load more
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        wallpapers_data = []
-        for wallpaper in page_obj:
-            wallpapers_data.append({
-                'id': wallpaper.id,
-                'title': wallpaper.title,
-                'thumbnail_url': wallpaper.thumbnail_url,
-                'downloads_count': wallpaper.downloads_count,
-                'is_trending': wallpaper.is_trending,
-                'resolution_width': wallpaper.resolution_width,
-                'resolution_height': wallpaper.resolution_height,
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    
+    if is_ajax:
+        serializer = CATEGORY_SERIALIZER.for_request(request)
+        rows = serializer.queryset(wallpapers, 'created_at', 'id')
+        
+        # Cursor mode for load more: newest first, no COUNT/OFFSET
+        if 'cursor' in request.GET and sort_by == '-created_at':
+            try:
+                page_items, next_cursor = KeysetPaginator(rows, 20).page(
+                    request.GET.get('cursor')
+                )
+            except ValueError:
+                return JsonResponse({'success': False, 'error': 'Invalid cursor'}, status=400)
+            
+            return compact_json_response({
+                'wallpapers': serializer.rows(page_items),
+                'has_next': next_cursor is not None,
+                'next_cursor': next_cursor,
             })
         
-        return JsonResponse({
-            'wallpapers': wallpapers_data,
+        paginator = Paginator(rows, 20)
+        paginator.count = category.desktop_wallpaper_count
+        page_obj = paginator.get_page(page)
+        
+        return compact_json_response({
+            'wallpapers': serializer.rows(page_obj),
             'has_next': page_obj.has_next(),
             'next_page': page_obj.next_page_number() if page_obj.has_next() else None,
         })
     
-    # Get categories for header
-    categories = Category.objects.filter(
-        is_active=True
-    ).annotate(
-        total_wallpapers=F('desktop_wallpaper_count')
-    ).filter(
-        total_wallpapers__gt=0
-    ).order_by('display_order', 'name')
+    # Pagination - the denormalized count stands in for Paginator's COUNT(*)
+    paginator = Paginator(wallpapers, 20)  # Show 20 per page
+    paginator.count = category.desktop_wallpaper_count
+    page_obj = paginator.get_page(page)
     
     context = {
         'category': category,
         'wallpapers': page_obj,
         'sort_by': sort_by,
-        'total_downloads': total_downloads,
-        'total_count': wallpapers.count(),
-        'categories': categories,
+        'total_downloads': category.desktop_downloads_count,
+        'total_likes': category.desktop_likes_count,
+        'total_count': category.desktop_wallpaper_count,
         'page_title': f'{category.name} Wallpapers - HD Desktop Backgrounds | WallDrafts',
         'meta_description': f'Download free HD {category.name} wallpapers for desktop. High-quality {category.name} backgrounds in various resolutions.',
         'meta_keywords': f'{category.name} wallpapers, {category.name} backgrounds, HD {category.name} images, free {category.name} wallpapers, desktop {category.name} backgrounds'
     }
     return render(request, 'wallpapers/category_detail.html', context)
 
+POPULAR_TAG_LIMIT = 30
+
+def _popular_tags():
+    return list(
+        Tag.objects.filter(desktop_wallpaper_count__gt=0)
+        .order_by('-desktop_wallpaper_count')[:POPULAR_TAG_LIMIT]
+    )
+
+@conditional_view(private=True)
+def tag_detail(request, slug):
+    """Show desktop wallpapers with a tag, newest first"""
+    tag = get_object_or_404(Tag, slug=slug)
+    
+    # Page through the link table's (tag, -wallpaper) index, then load
+    # just that page of wallpapers by primary key
+    wallpaper_ids = DesktopWallpaperTag.objects.filter(tag=tag).order_by(
+        '-wallpaper_id'
+    ).values_list('wallpaper_id', flat=True)
+    paginator = Paginator(wallpaper_ids, 24)
+    paginator.count = tag.desktop_wallpaper_count
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    page_ids = list(page_obj)
+    by_id = DesktopWallpaper.objects.in_bulk(page_ids)
+    wallpapers = [by_id[wallpaper_id] for wallpaper_id in page_ids if wallpaper_id in by_id]
+    
+    context = {
+        'tag': tag,
+        'wallpapers': wallpapers,
+        'page_obj': page_obj,
+        'popular_tags': get_or_build('tags:popular', _popular_tags),
+        'page_title': f'{tag.name} Wallpapers - HD Desktop Backgrounds | WallDrafts',
+        'meta_description': f'Download free HD {tag.name} wallpapers for desktop. High-quality {tag.name} backgrounds in various resolutions.',
+        'meta_keywords': f'{tag.name} wallpapers, {tag.name} backgrounds, HD {tag.name} images, free {tag.name} wallpapers'
+    }
+    return render(request, 'wallpapers/tag_detail.html', context)
+
+SEARCH_SWATCHES = (
+    '#ef4444', '#f97316', '#eab308', '#22c55e', '#14b8a6',
+    '#3b82f6', '#8b5cf6', '#ec4899', '#ffffff', '#6b7280', '#000000',
+)
+
 def search(request):
-    """Search wallpapers by title and tags"""
+    """Search wallpapers by title and tags, optionally near a ``?color=``"""
     query = request.GET.get('q', '').strip()
+    color = request.GET.get('color', '').strip()
+    if color and color_bucket(color) is None:
+        color = ''
     
-    if not query:
+    if not query and not color:
         context = {
             'query': '', 
             'results': [],
+            'swatches': SEARCH_SWATCHES,
             'page_title': 'Search Wallpapers | WallDrafts',
             'meta_description': 'Search for HD wallpapers by title, tags, or category. Find the perfect desktop background for your device.',
             'meta_keywords': 'search wallpapers, find backgrounds, wallpaper search, desktop backgrounds search'
         }
         return render(request, 'wallpapers/search.html', context)
     
-    # Search only in desktop wallpapers
-    results = DesktopWallpaper.objects.filter(
-        Q(title__icontains=query) | Q(tags__icontains=query)
-    ).order_by('-created_at')
+    if query:
+        # Ranked full-text search over desktop wallpapers
+        results = search_wallpapers(query, color=color or None)
+    else:
+        # Nearest palette colors through the bucket index
+        results = search_by_color(color)
+    total_results = results.count()
     
     # Pagination
     paginator = Paginator(results, 24)
     page = request.GET.get('page')
     page_obj = paginator.get_page(page)
     
+    label = query or color
     context = {
         'query': query,
+        'color': color,
+        'swatches': SEARCH_SWATCHES,
         'results': page_obj,
-        'total_results': results.count(),
-        'page_title': f'Search Results for "{query}" | WallDrafts',
-        'meta_description': f'Found {results.count()} wallpapers matching "{query}". Download free HD wallpapers for your desktop.',
-        'meta_keywords': f'{query} wallpapers, search results, {query} backgrounds, HD {query} images'
+        'total_results': total_results,
+        'page_title': f'Search Results for "{label}" | WallDrafts',
+        'meta_description': f'Found {total_results} wallpapers matching "{label}". Download free HD wallpapers for your desktop.',
+        'meta_keywords': f'{label} wallpapers, search results, {label} backgrounds, HD {label} images'
     }
     return render(request, 'wallpapers/search.html', context)
 
 def trending_wallpapers(request):
-    """Show trending wallpapers - DESKTOP ONLY"""
+    """Show trending wallpapers - DESKTOP ONLY
+    
+    The flagged set is the top TRENDING_TOP_K by decayed score
+    (``manage.py update_trending``), read straight off the score index.
+    """
     sort_by = request.GET.get('sort', 'trending')
     
+    wallpapers = DesktopWallpaper.objects.filter(is_trending=True)
     if sort_by == 'downloads':
-        wallpapers = DesktopWallpaper.objects.filter(
-            is_trending=True
-        ).order_by('-downloads_count')
+        wallpapers = wallpapers.order_by('-downloads_count')
     elif sort_by == 'likes':
-        wallpapers = DesktopWallpaper.objects.filter(
-            is_trending=True
-        ).order_by('-likes_count')
+        wallpapers = wallpapers.order_by('-likes_count')
     elif sort_by == 'recent':
-        wallpapers = DesktopWallpaper.objects.filter(
-            is_trending=True
-        ).order_by('-created_at')
+        wallpapers = wallpapers.order_by('-created_at')
     else:  # trending (default)
-        wallpapers = DesktopWallpaper.objects.filter(
-            is_trending=True
-        ).order_by('-created_at')
+        wallpapers = wallpapers.order_by('-trending_score', '-id')
     
     # Calculate stats
-    total_downloads = wallpapers.aggregate(total_downloads=Sum('downloads_count'))['total_downloads'] or 0
-    total_likes = wallpapers.aggregate(total_likes=Sum('likes_count'))['total_likes'] or 0
+    totals = wallpapers.aggregate(
+        total_downloads=Sum('downloads_count'), total_likes=Sum('likes_count')
+    )
+    total_downloads = totals['total_downloads'] or 0
+    total_likes = totals['total_likes'] or 0
     
     # Pagination
     paginator = Paginator(wallpapers, 24)
     page = request.GET.get('page')
     page_obj = paginator.get_page(page)
     
-    # Get categories for header
-    categories = Category.objects.filter(
-        is_active=True
-    ).annotate(
-        total_wallpapers=F('desktop_wallpaper_count')
-    ).filter(
-        total_wallpapers__gt=0
-    ).order_by('display_order', 'name')
-    
     context = {
         'wallpapers': page_obj,
         'sort_by': sort_by,
         'total_downloads': total_downloads,
         'total_likes': total_likes,
-        'categories': categories,
         'page_title': 'Trending Wallpapers - Most Popular HD Backgrounds | WallDrafts',
         'meta_description': 'Discover the most popular trending wallpapers. Download free HD backgrounds that are currently trending worldwide.',
         'meta_keywords': 'trending wallpapers, popular backgrounds, hot wallpapers, viral wallpapers, most downloaded backgrounds'
@@ -480,24 +597,53 @@ def trending_wallpapers(request):
     return render(request, 'wallpapers/trending.html', context)
 
 def random_wallpaper(request):
-    """Redirect to a random wallpaper detail page"""
-    wallpaper_ids = DesktopWallpaper.objects.values_list('id', flat=True)
-    if wallpaper_ids:
-        random_id = random.choice(wallpaper_ids)
+    """Redirect to a random wallpaper detail page
+    
+    Optional ``?category=<slug>`` and ``?quality=<label>`` narrow the pick.
+    """
+    category_id = None
+    category_slug = request.GET.get('category')
+    if category_slug:
+        category = next(
+            (c for c in get_nav_categories() if c.slug == category_slug), None
+        )
+        if category is None:
+            return redirect('wallpapers:home')
+        category_id = category.id
+    
+    # Unknown labels are ignored rather than given their own cached bounds
+    quality = request.GET.get('quality')
+    quality_labels = {value for value, _ in DesktopWallpaper._meta.get_field('quality_label').choices}
+    if quality not in quality_labels:
+        quality = None
+    
+    random_id = random_wallpaper_id(category_id=category_id, quality=quality)
+    if random_id:
         return redirect('wallpapers:wallpaper_detail', id=random_id)
     return redirect('wallpapers:home')
 
 
-def home(request):
-    """Homepage view - Desktop only"""
-    
-    # Hero Section: Get ONE featured desktop wallpaper
-    hero_wallpaper = DesktopWallpaper.objects.filter(
-        is_featured=True
-    ).order_by('-created_at').first()
-    
-    if not hero_wallpaper:
-        hero_wallpaper = DesktopWallpaper.objects.order_by('-created_at').first()
+def _daily_featured_wallpaper():
+    """Today's scheduled desktop hero, falling back to the newest wallpaper
+    
+    Cached per day and catalog version (schedule edits bump the version).
+    """
+    today = timezone.localdate()
+    
+    def build():
+        schedules = attach_wallpapers(list(FeaturedSchedule.objects.filter(
+            featured_date=today, is_daily_featured=True, wallpaper_type='desktop'
+        ).order_by('display_order')))
+        for schedule in schedules:
+            if schedule.get_wallpaper():
+                return schedule.get_wallpaper()
+        return DesktopWallpaper.objects.order_by('-created_at', '-id').first()
+    
+    return get_or_build(f'featured:daily:{today.isoformat()}', build, timeout=24 * 60 * 60)
+
+
+def _build_home_context():
+    """Run the homepage queries and return picklable results for caching"""
     
     # ===== UPDATED: Efficient single query to get latest from each category =====
     # Get the latest wallpaper ID for each category
@@ -534,28 +680,29 @@ def home(request):
     # ===== END UPDATE =====
     
     # Trending Now Section (12 trending desktop wallpapers)
-    trending_wallpapers = DesktopWallpaper.objects.filter(
+    trending_wallpapers = list(DesktopWallpaper.objects.filter(
         is_trending=True
-    ).order_by('-created_at')[:12]
+    ).order_by('-trending_score', '-id')[:12])
     
-    # Categories for dropdown (this remains the same)
-    categories = Category.objects.filter(
-        is_active=True
-    ).annotate(
-        total_wallpapers=F('desktop_wallpaper_count')
-    ).filter(
-        total_wallpapers__gt=0
-    ).order_by('display_order', 'name')
-    
-    context = {
-        'hero_wallpaper': hero_wallpaper,
+    return {
         'recent_wallpapers': recent_wallpapers,
         'trending_wallpapers': trending_wallpapers,
-        'categories': categories,
+    }
+
+
+def home(request):
+    """Homepage view - Desktop only"""
+    
+    # Cached per catalog version, so repeat hits run no queries
+    context = dict(get_or_build('home:context', _build_home_context))
+    context.update({
+        'hero_wallpaper': _daily_featured_wallpaper(),
+        # Live, so kept out of the catalog-versioned context
+        'hot_wallpapers': hot_wallpapers(12),
         'page_title': 'WallDrafts - Free HD Wallpapers for Desktop',
         'meta_description': 'Download thousands of free HD wallpapers for desktop. Curated collection of beautiful backgrounds updated daily. No registration required.',
         'meta_keywords': 'free wallpapers, HD wallpapers, desktop backgrounds, wallpaper download, 4K wallpapers, background images'
-    }
+    })
     return render(request, 'wallpapers/home.html', context)
 
 
@@ -593,12 +740,8 @@ def wallpaper_list(request):
     page = request.GET.get('page')
     page_obj = paginator.get_page(page)
     
-    # Get categories for header
-    categories = Category.objects.filter(is_active=True)
-    
     context = {
         'wallpapers': page_obj,
-        'categories': categories,
         'sort_by': sort_by,
         'page_title': 'Desktop Wallpapers - HD Backgrounds Collection | WallDrafts',
         'meta_description': 'Browse our collection of HD desktop wallpapers. Free downloads in various resolutions including 4K, 2K, and Full HD.',
@@ -608,15 +751,6 @@ def wallpaper_list(request):
 
 def favorites_page(request):
     """Display user's favorite wallpapers from localStorage"""
-    # Get categories for header (this stays the same)
-    categories = Category.objects.filter(
-        is_active=True
-    ).annotate(
-        total_wallpapers=F('desktop_wallpaper_count')
-    ).filter(
-        total_wallpapers__gt=0
-    ).order_by('display_order', 'name')
-    
     # Get session favorites in order they were added
     session_favorites = []
     session_favorite_timestamps = {}
@@ -639,7 +773,6 @@ def favorites_page(request):
                 continue
     
     context = {
-        'categories': categories,
         'session_favorites': session_favorites,
         'page_title': 'My Favorites - Saved Wallpapers | WallDrafts',
         'meta_description': 'Access your favorite wallpapers collection. All your saved HD backgrounds in one place for easy downloading.',
@@ -647,6 +780,12 @@ def favorites_page(request):
     }
     return render(request, 'wallpapers/favorites.html', context)
 
+def _count_view(request, id):
+    """Views answered with 304 still count"""
+    counter_buffer.add(id, 'views_count')
+    hot_tracker.record(id, 'view')
+
+@conditional_view(private=True, not_modified=_count_view)
 def wallpaper_detail(request, id):
     """Wallpaper detail view - DESKTOP ONLY"""
     wallpaper = get_object_or_404(DesktopWallpaper, id=id)
@@ -654,7 +793,10 @@ def wallpaper_detail(request, id):
         category=wallpaper.category
     ).exclude(id=id).order_by('?')[:8]  # Use random ordering
     
-    wallpaper.increment_views()
+    # Count the view (flushed in batches) and show it straight away
+    counter_buffer.add(id, 'views_count')
+    hot_tracker.record(id, 'view')
+    counter_buffer.apply_pending(wallpaper)
     
     # Format download time display
     download_time = "Just now"
@@ -666,24 +808,15 @@ def wallpaper_detail(request, id):
         else:
             download_time = "Very Popular"
     
-    # Get categories for header
-    categories = Category.objects.filter(
-        is_active=True
-    ).annotate(
-        total_wallpapers=F('desktop_wallpaper_count')
-    ).filter(
-        total_wallpapers__gt=0
-    ).order_by('display_order', 'name')
-    
     # Check like/favorite status
     is_liked = request.session.get(f'liked_{id}', False)
     is_favorited = request.session.get(f'favorited_{id}', False)
     
     context = {
         'wallpaper': wallpaper,
+        'wallpaper_tags': wallpaper.tag_objects.all()[:10],
         'similar_wallpapers': similar_wallpapers,
         'download_time': download_time,
-        'categories': categories,
         'is_liked': is_liked,
         'is_favorited': is_favorited,
         'page_title': f'{wallpaper.title} - HD Wallpaper Download | WallDrafts',
@@ -692,6 +825,61 @@ def wallpaper_detail(request, id):
     }
     return render(request, 'wallpapers/wallpaper_detail.html', context)
 
+def _sitemap_base_url(request):
+    return f'{sitemap_files.SITEMAP_PROTOCOL}://{get_current_site(request).domain}'
+
+def sitemap_index(request):
+    """Sitemap index: small Django sitemaps plus the wallpaper sections.
+    
+    Section lastmods come from the generator's manifest; before the first
+    ``generate_sitemaps`` run the section list is derived from the highest
+    id alone.
+    """
+    base_url = _sitemap_base_url(request)
+    manifest = sitemap_files.read_manifest()
+    if manifest is not None:
+        sections = sorted(
+            (int(section), signature['lastmod'][:10])
+            for section, signature in manifest['sections'].items()
+        )
+    else:
+        sections = [(section, None) for section in range(sitemap_files.section_count_estimate())]
+    
+    entries = [
+        (base_url + reverse('wallpapers:sitemap_section', args=[name]), None)
+        for name in ('static', 'categories')
+    ]
+    entries += [
+        (base_url + reverse('wallpapers:sitemap_wallpapers', args=[section]), lastmod)
+        for section, lastmod in sections
+    ]
+    
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for location, lastmod in entries:
+        lastmod_tag = f'<lastmod>{lastmod}</lastmod>' if lastmod else ''
+        lines.append(f'<sitemap><loc>{location}</loc>{lastmod_tag}</sitemap>')
+    lines.append('</sitemapindex>')
+    return HttpResponse('\n'.join(lines) + '\n', content_type='application/xml')
+
+def sitemap_wallpapers(request, section):
+    """One gzipped section of up to SITEMAP_SECTION_SIZE wallpaper URLs"""
+    path = sitemap_files.section_path(section)
+    if os.path.exists(path):
+        return FileResponse(open(path, 'rb'), content_type='application/x-gzip')
+    
+    # Not generated yet: stream this id range only
+    if section >= sitemap_files.section_count_estimate():
+        raise Http404('No such sitemap section')
+    return StreamingHttpResponse(
+        sitemap_files.iter_gzip(
+            sitemap_files.iter_section_xml(section, _sitemap_base_url(request))
+        ),
+        content_type='application/x-gzip',
+    )
+
 # New pages for legal documents
 def terms_of_service(request):
     """Terms of Service page"""